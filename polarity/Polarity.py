@@ -9,7 +9,7 @@ import sys
 import time
 import warnings
 from copy import deepcopy
-from threading import Lock
+from queue import Queue
 from typing import Dict, List, Union
 
 from tqdm import TqdmWarning
@@ -31,7 +31,8 @@ from polarity.types import (
     Series,
     Thread,
 )
-from polarity.types.download_log import DownloadLog
+from polarity.types.download_log import download_log
+from polarity.types.download_queue import DownloadQueue
 from polarity.types.filter import Filter, build_filter
 from polarity.types.progressbar import ProgressBar
 from polarity.update import check_for_updates, windows_setup
@@ -40,12 +41,17 @@ from polarity.utils import (
     dict_merge,
     filename_datetime,
     get_compatible_extractor,
+    get_pool_usage,
     is_content_id,
     normalize_number,
     parse_content_id,
+    rate_limiter,
+    response_cache,
     sanitize_path,
     send_android_notification,
     set_console_title,
+    set_pool_size,
+    set_session_mode,
     vprint,
 )
 from polarity.version import __version__
@@ -71,15 +77,25 @@ class Polarity:
         """
 
         self.urls = urls
-        # Load the download log from the default path
-        self.__download_log = DownloadLog()
-        self.__extract_lock = Lock()
-        # List with extracted Episode or Movie objects, for download tasks
-        self.download_pool = []
+        # List with the urls to extract, in the order they were inputted
+        self.pool = []
+        # Queue with the urls waiting to be extracted, for extraction tasks
+        self.url_queue = Queue()
+        self._seen_urls = set()
+        # Filters applied to every url, including the ones read later
+        self._global_filters = []
+        # Extractors whose login has already been checked, and if it's
+        # possible to extract with them
+        self._checked_logins: Dict[str, bool] = {}
+        # Queue with extracted Episode or Movie objects, for download tasks,
+        # created on start with the configured size
+        self.download_pool: DownloadQueue = None
         # List with extracted Series or Movie objects, for metadata tasks
         self.extracted_items = []
         # List with active downloaders
         self._downloaders = []
+        # Queue with downloads waiting to be remuxed, for remux tasks
+        self.remux_queue = Queue()
         self._started = False
         self._finished_extractions = False
         self._start_time = 0
@@ -131,6 +147,51 @@ class Polarity:
             vprint(lang["main"]["unlocking"] % downloader.name, "debug")
             downloader._unlock()
 
+    @staticmethod
+    def _join(task: Thread) -> None:
+        """
+        Waits until a task finishes, joining with a timeout since on Windows
+        a join without one can't be interrupted with Ctrl+C
+        """
+        while task.is_alive():
+            task.join(1)
+
+    def configure_http(self) -> None:
+        """
+        Size the HTTP sessions' connection pools, by default every concurrent
+        request gets a connection, avoiding connections being discarded
+        and opened again
+        """
+        set_session_mode(options["http"]["per_thread_sessions"])
+        rate_limiter.set_limits(options["http"]["rate_limits"])
+        ttl = dict(options["http"]["cache"]["ttl"])
+        if options["action"] == "sync":
+            # Sync runs look for new content, revalidate cached lists of content
+            ttl.update({"series": 0, "season": 0, "episodes": 0})
+        response_cache.configure(
+            paths["cache"] if options["http"]["cache"]["enabled"] else None,
+            int(options["http"]["cache"]["max_size"]),
+            ttl,
+        )
+        pool_maxsize = options["http"]["pool_maxsize"]
+        if pool_maxsize == "auto":
+            # Every extraction fetches with up to fetch_workers threads, and
+            # the downloads' segment threads are capped by max_workers
+            workers = options["download"]["max_workers"]
+            if workers == "auto":
+                workers = int(options["download"]["active_downloads"]) * int(
+                    options["download"]["penguin"]["threads"]
+                )
+            pool_maxsize = int(options["extractor"]["active_extractions"]) * max(
+                int(options["extractor"]["fetch_workers"]), 1
+            ) + int(workers)
+        pool_connections = int(options["http"]["pool_connections"])
+        vprint(
+            lang["polarity"]["pool_size"] % (pool_connections, int(pool_maxsize)),
+            level="debug",
+        )
+        set_pool_size(pool_connections, int(pool_maxsize))
+
     def delete_session_log(self) -> None:
         """Delete the log created by this instance"""
         try:
@@ -183,8 +244,9 @@ class Polarity:
         if options["dump"]:
             self.dump_information(options["dump"])
 
-        if options["action"] == "download":
-            if not self.urls:
+        if options["action"] in ("download", "sync"):
+            input_file = options.get("input_file")
+            if not self.urls and not input_file:
                 if "--polarity-disable-file-log" not in sys.argv:
                     vprint(lang["polarity"]["deleting_log"], "debug")
                     self.delete_session_log()
@@ -196,39 +258,27 @@ class Polarity:
             if not shutil.which("ffmpeg"):
                 raise Exception(lang["polarity"]["except"]["missing_ffmpeg"])
 
-            self.pool = [
-                {
-                    "url": url,
-                    "filters": [],
-                    "reserved": False,
-                    "extractor": get_compatible_extractor(url),
-                }
-                for url in set(self.urls)
-            ]
-
-            for item in self.pool:
-                # check if item's extractor requires login, if yes,
-                # ask user for login here, otherwise if more than one url
-                # is inputted the email and password prompts would collide one
-                # with eachother
-                if item["extractor"] is None:
-                    continue
-                if (
-                    flags.ExtractionLoginRequired in item["extractor"][1].FLAGS
-                    and not item["extractor"][1]().is_logged_in()
-                ):
-                    vprint(lang["polarity"]["login_required"] % item["extractor"][0])
-                    # login into the extractor
-                    item["extractor"][1]().login()
+            for url in self.urls:
+                # Login prompts would read from the urls in stdin
+                self.add_url(url, interactive=input_file != "-")
 
             if options["filters"]:
                 self.process_filters(filters=options["filters"])
 
+            self.configure_http()
+            self.download_pool = DownloadQueue(options["download"]["queue_size"])
+
+            extraction_tasks = options["extractor"]["active_extractions"]
+            if not input_file:
+                # If there are more desired extraction tasks than urls
+                # set the number of extraction tasks to the number of urls
+                extraction_tasks = min(extraction_tasks, len(self.pool))
+
             # create tasks
             tasks = {
                 "extraction": create_tasks(
                     "Extraction",
-                    options["extractor"]["active_extractions"],
+                    extraction_tasks,
                     self._extract_task,
                 ),
                 "download": create_tasks(
@@ -236,29 +286,78 @@ class Polarity:
                     options["download"]["active_downloads"],
                     self._download_task,
                 ),
+                "remux": create_tasks(
+                    "Remux",
+                    options["download"]["remux_workers"],
+                    self._remux_task,
+                ),
                 "metadata": [],
             }
 
-            # If there are more desired extraction tasks than urls
-            # set the number of extraction tasks to the number of urls
-            if options["extractor"]["active_extractions"] > len(self.pool):
-                options["extractor"]["active_extractions"] = len(self.pool)
-
             # Start the tasks
             for task_group in tasks.values():
                 for task in task_group:
                     task.start()
 
+            if input_file:
+                # Urls are extracted as they're read from the file
+                Thread(
+                    "Input_Task",
+                    target=self._input_task,
+                    args=(input_file, extraction_tasks),
+                    daemon=True,
+                ).start()
+            else:
+                # Stop the extraction tasks once the urls have been taken
+                for _ in range(extraction_tasks):
+                    self.url_queue.put(None)
+
             # Wait until workers finish
-            while True:
-                if not [w for w in tasks["extraction"] if w.is_alive()]:
-                    if not self._finished_extractions:
-                        vprint(lang["polarity"]["finished_extraction"])
-                    self._finished_extractions = True
-                    if not [w for w in tasks["download"] if w.is_alive()]:
-                        break
-                time.sleep(0.1)
+            for task in tasks["extraction"]:
+                self._join(task)
+            vprint(lang["polarity"]["finished_extraction"])
+            self._finished_extractions = True
+            # Stop the download tasks once the download pool is empty
+            self.download_pool.close(len(tasks["download"]))
+            for task in tasks["download"]:
+                self._join(task)
+            # Stop the remux tasks once the queued downloads are remuxed
+            for _ in tasks["remux"]:
+                self.remux_queue.put(None)
+            for task in tasks["remux"]:
+                self._join(task)
             self._end_time = time.time()
+            vprint(
+                lang["polarity"]["queue_usage"]
+                % (
+                    self.download_pool.added,
+                    self.download_pool.peak_depth,
+                    self.download_pool.maxsize or "unlimited",
+                    datetime.timedelta(seconds=self.download_pool.blocked_time),
+                ),
+                level="debug",
+            )
+            for host, usage in get_pool_usage().items():
+                vprint(
+                    lang["polarity"]["pool_usage"]
+                    % (host, usage["requests"], usage["connections"], usage["size"]),
+                    level="debug",
+                )
+            vprint(
+                lang["polarity"]["response_cache_usage"]
+                % (
+                    response_cache.stats["hits"],
+                    response_cache.stats["revalidated"],
+                    response_cache.stats["misses"],
+                ),
+                level="debug",
+            )
+            for host, waited in rate_limiter.waited.items():
+                vprint(
+                    lang["polarity"]["rate_limit_wait"]
+                    % (host, datetime.timedelta(seconds=waited)),
+                    level="debug",
+                )
             vprint(
                 lang["polarity"]["all_tasks_finished"]
                 % datetime.timedelta(seconds=self._end_time - self._start_time),
@@ -459,6 +558,7 @@ class Polarity:
                         # global group, append to all url's filter lists
                         for url in self.pool:
                             url["filters"].append(_filter)
+                        self._global_filters.append(_filter)
                 # Avoid creating another Filter object with the filter
                 # as the parameter
                 skip_next_item = True
@@ -471,16 +571,88 @@ class Polarity:
         for hook in self.hooks[name]:
             hook(content)
 
-    def _extract_task(self, id: int) -> None:
-        def take_item() -> Union[dict, None]:
-            with self.__extract_lock:
-                available = [i for i in self.pool if not i["reserved"]]
-                if not available:
-                    return
-                item = available[0]
-                self.pool[self.pool.index(item)]["reserved"] = True
-            return item
+    def add_url(self, url: str, interactive: bool = True) -> None:
+        """
+        Add an url or content identifier to the extraction queue, unless it
+        has already been added
+
+        :param url: Url or content identifier
+        :param interactive: Allow asking the user for login details, if
+        the url's extractor requires login
+        """
+        url = url.strip()
+        if not url or url in self._seen_urls:
+            return
+        self._seen_urls.add(url)
+        item = {
+            "url": url,
+            "filters": list(self._global_filters),
+            "extractor": get_compatible_extractor(url),
+            # Content of earlier urls is downloaded first
+            "order": len(self.pool),
+        }
+        if not self._check_login(item["extractor"], interactive):
+            return
+        self.pool.append(item)
+        self.url_queue.put(item)
+
+    def _check_login(self, extractor: tuple, interactive: bool = True) -> bool:
+        """
+        Check if the extractor requires login, if yes, ask user for login
+        here, otherwise if more than one url is inputted the email and
+        password prompts would collide one with eachother
+
+        :param extractor: Tuple with the extractor's name and class
+        :param interactive: Allow asking the user for login details
+        :return: False if the extractor requires login and it isn't possible
+        """
+        if extractor is None:
+            return True
+        name, extractor_class = extractor
+        if name in self._checked_logins:
+            return self._checked_logins[name]
+        if (
+            flags.ExtractionLoginRequired not in extractor_class.FLAGS
+            or extractor_class().is_logged_in()
+        ):
+            self._checked_logins[name] = True
+            return True
+        credentials = options["extractor"].get(name.lower(), {})
+        if not interactive and not (
+            credentials.get("username") and credentials.get("password")
+        ):
+            # Prompts would take their input from the urls being read
+            vprint(lang["polarity"]["login_required_input"] % name, level="error")
+            self._checked_logins[name] = False
+            return False
+        vprint(lang["polarity"]["login_required"] % name)
+        # login into the extractor
+        extractor_class().login()
+        self._checked_logins[name] = True
+        return True
+
+    def _input_task(self, path: str, consumers: int) -> None:
+        """
+        Add the urls of a file to the extraction queue as they're read.
+        Login details can't be asked for while reading, extractors requiring
+        login need them in the configuration
+
+        :param path: Path of a file with an url per line, "-" for stdin
+        :param consumers: Number of extraction tasks to stop once the file
+        has been read
+        """
+        try:
+            stdin = path == "-"
+            with open(sys.stdin.fileno() if stdin else path, closefd=not stdin) as f:
+                for line in f:
+                    # Skip comments
+                    if not line.startswith("#"):
+                        self.add_url(line, interactive=False)
+        finally:
+            for _ in range(consumers):
+                self.url_queue.put(None)
 
+    def _extract_task(self, id: int) -> None:
         def process_item_hook(content) -> None:
             item = content["content"]
             if not isinstance(item, Content):
@@ -488,13 +660,14 @@ class Polarity:
                 return
             file_path = self._format_filename(item)
             item.output = file_path
-            self.download_pool.append(item)
+            # Blocks while the download pool is full
+            self.download_pool.put(item, order=order)
 
         while True:
-            item = take_item()
+            item = self.url_queue.get()
             if item is None:
                 break
-            _extractor = get_compatible_extractor(item["url"])
+            _extractor = item["extractor"]
             if _extractor is None:
                 vprint(
                     lang["dl"]["no_extractor"]
@@ -509,6 +682,7 @@ class Polarity:
                 continue
 
             name, extractor = _extractor
+            order = item["order"]
             self._execute_hooks(
                 "started_extraction", {"extractor": name, "name": item["url"]}
             )
@@ -528,13 +702,11 @@ class Polarity:
 
     def _download_task(self, id: int) -> None:
         while True:
-            if not self.download_pool and self._finished_extractions:
-                break
-            elif not self.download_pool:
-                time.sleep(0.1)
-                continue
             # Take an item from the download pool
-            item = self.download_pool.pop(0)
+            item = self.download_pool.get()
+            if item is None:
+                # Extractions have finished and the pool is empty
+                break
             if item.skip_download is not None:
                 vprint(
                     lang["dl"]["cannot_download_content"]
@@ -547,7 +719,7 @@ class Polarity:
                 )
                 continue
             elif (
-                self.__download_log.in_log(item.content_id)
+                download_log.in_log(item.content_id)
                 and not options["download"]["redownload"]
             ):
                 vprint(lang["dl"]["no_redownload"] % item.short_name, level="warning")
@@ -562,27 +734,65 @@ class Polarity:
             # TODO: external downloader support
             _downloader = PenguinDownloader
             downloader = _downloader(item, _options={"hooks": self.hooks}, _thread_id=id)
+            # Leave the remux to the remux tasks, freeing this task for the
+            # next item as soon as the segments are downloaded
+            downloader.defer_remux = options["download"]["remux_workers"] > 0
             self._downloaders.append(downloader)
             downloader.start()
             # wait until downloader has finished
-            while downloader.is_alive():
-                time.sleep(0.1)
-            del self._downloaders[self._downloaders.index(downloader)]
+            downloader.join()
+            if downloader.remux_pending:
+                self.remux_queue.put((item, downloader))
+                continue
+            self._finish_download(item, downloader)
 
-            if downloader.success:
+    def _remux_task(self, id: int) -> None:
+        while True:
+            entry = self.remux_queue.get()
+            if entry is None:
+                break
+            item, downloader = entry
+            try:
+                downloader.remux()
+            except KeyboardInterrupt:
+                # unlock the download to avoid rogue lock files
+                downloader._unlock()
+                raise
+            except Exception as e:
+                # Keep remuxing the rest of the downloads, this one is
+                # left unsuccessful and unlocked
+                downloader.success = False
+                if downloader._is_locked():
+                    downloader._unlock()
                 vprint(
-                    lang["dl"]["download_successful"]
-                    % (lang["types"][item.__class__.__name__.lower()], item.short_name)
-                )
-                send_android_notification(
-                    "Polarity",
-                    lang["dl"]["download_successful"]
-                    % (lang["types"][item.__class__.__name__.lower()], item.short_name),
-                    id=item.short_name,
-                    action=f"'termux-share \"{item.output}\"'",
+                    lang["dl"]["remux_failed"]
+                    % (
+                        lang["types"][item.__class__.__name__.lower()],
+                        item.short_name,
+                        e,
+                    ),
+                    level="error",
                 )
-                # Download finished, add identifier to download log
-                self.__download_log.add(item.content_id)
+            finally:
+                self._finish_download(item, downloader)
+
+    def _finish_download(self, item: Content, downloader: PenguinDownloader) -> None:
+        del self._downloaders[self._downloaders.index(downloader)]
+
+        if downloader.success:
+            vprint(
+                lang["dl"]["download_successful"]
+                % (lang["types"][item.__class__.__name__.lower()], item.short_name)
+            )
+            send_android_notification(
+                "Polarity",
+                lang["dl"]["download_successful"]
+                % (lang["types"][item.__class__.__name__.lower()], item.short_name),
+                id=item.short_name,
+                action=f"'termux-share \"{item.output}\"'",
+            )
+            # Download finished, add identifier to download log
+            download_log.add(item.content_id)
 
     @staticmethod
     def _format_filename(content: Union[Episode, Movie, Content]) -> str:
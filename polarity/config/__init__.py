@@ -15,9 +15,11 @@ def get_paths() -> dict:
     __path_arguments = {
         "--accounts-directory": "account",
         "--binaries-directory": "bin",
+        "--cache-directory": "cache",
         "--config-file": "cfg",
         "--download-log-file": "dl_log",
         "--log-directory": "log",
+        "--sync-state-file": "sync_state",
         "--temp-directory": "tmp",
     }
 
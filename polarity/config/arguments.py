@@ -8,7 +8,7 @@ from polarity.lang import lang
 from polarity.version import __version__
 
 urls = []
-ACTIONS = ("download", "search", "livetv", "update")
+ACTIONS = ("download", "search", "livetv", "sync", "update")
 
 
 def parse_arguments() -> dict:
@@ -61,7 +61,7 @@ lang_group = lang["args"]["groups"]
 preamble = {"bash": "", "zsh": "", "tcsh": ""}
 types = {}
 # extensions to generate preambles of
-PREAMBLE_GEN = (".toml", ".log")
+PREAMBLE_GEN = (".toml", ".log", ".json")
 
 # shtab stuff, generate file completion with custom extensions
 # for --config-file arguments and alike
@@ -138,6 +138,7 @@ general.add_argument(
     "--check-for-updates", action="store_true", help=lang_help["update_check"]
 )
 general.add_argument("--filters", help=lang_help["filters"])
+general.add_argument("--input-file", help=lang_help["input_file"]).complete = shtab.FILE
 general.add_argument(
     "--accounts-directory",
     help=lang_help["accounts_dir"],
@@ -158,16 +159,46 @@ general.add_argument(
     help=lang_help["log_file"],
     dest=None,
 ).complete = types[".log"]
+general.add_argument(
+    "--sync-state-file",
+    help=lang_help["sync_state_file"],
+    dest=None,
+).complete = types[".json"]
 general.add_argument(
     "--log-directory",
     help=lang_help["log_dir"],
     dest=None,
 ).complete = shtab.DIRECTORY
+general.add_argument(
+    "--cache-directory",
+    help=lang_help["cache_dir"],
+    dest=None,
+).complete = shtab.DIRECTORY
+general.add_argument(
+    "--no-response-cache",
+    help=lang_help["no_response_cache"],
+    action="store_false",
+    default=None,
+    dest="http/cache/enabled",
+)
 general.add_argument(
     "--temp-directory",
     help=lang_help["temp_dir"],
     dest=None,
 ).complete = shtab.DIRECTORY
+general.add_argument(
+    "--fetch-workers",
+    type=int,
+    help=lang_help["fetch_workers"],
+    dest="extractor/fetch_workers",
+)
+general.add_argument(
+    "--no-lazy-streams",
+    help=lang_help["no_lazy_streams"],
+    action="store_false",
+    default=None,
+    dest="extractor/lazy_streams",
+)
 shtab.add_argument_to(general, preamble=preamble)
 
 # Search options
@@ -216,6 +247,24 @@ download_redownload.add_argument(
     help=lang_help["do_not_redownload"],
     dest="download/redownload",
 )
+download.add_argument(
+    "--max-bandwidth",
+    type=int,
+    help=lang_help["max_bandwidth"],
+    dest="download/max_bandwidth",
+)
+download.add_argument(
+    "--queue-size",
+    type=int,
+    help=lang_help["queue_size"],
+    dest="download/queue_size",
+)
+download.add_argument(
+    "--remux-workers",
+    type=int,
+    help=lang_help["remux_workers"],
+    dest="download/remux_workers",
+)
 download.add_argument(
     "--episode-format",
     help=lang_help["format_episode"],
@@ -249,6 +298,51 @@ penguin.add_argument(
     help=lang["penguin"]["args"]["threads"],
     dest="download/penguin/threads",
 )
+penguin.add_argument(
+    "--penguin-engine",
+    choices=["threads", "asyncio"],
+    help=lang["penguin"]["args"]["engine"],
+    dest="download/penguin/engine",
+)
+penguin.add_argument(
+    "--penguin-connections",
+    type=int,
+    help=lang["penguin"]["args"]["connections"],
+    dest="download/penguin/connections",
+)
+penguin.add_argument(
+    "--penguin-chunk-size",
+    type=int,
+    help=lang["penguin"]["args"]["chunk_size"],
+    dest="download/penguin/chunk_size",
+)
+penguin.add_argument(
+    "--penguin-http2",
+    help=lang["penguin"]["args"]["http2"],
+    action="store_true",
+    default=None,
+    dest="download/penguin/http2",
+)
+penguin.add_argument(
+    "--penguin-no-direct-write",
+    help=lang["penguin"]["args"]["no_direct_write"],
+    action="store_false",
+    default=None,
+    dest="download/penguin/direct_write",
+)
+penguin.add_argument(
+    "--penguin-pipelined-remux",
+    help=lang["penguin"]["args"]["pipelined_remux"],
+    action="store_true",
+    default=None,
+    dest="download/penguin/pipelined_remux",
+)
+penguin.add_argument(
+    "--penguin-range-size",
+    type=int,
+    help=lang["penguin"]["args"]["range_size"],
+    dest="download/penguin/range_size",
+)
 penguin.add_argument(
     "--penguin-tag-output",
     help=lang["penguin"]["args"]["tag_output"],
@@ -24,6 +24,20 @@ config = {
     "download": {
         # Maximum active downloads
         "active_downloads": 3,
+        # Maximum segment download threads between all active downloads,
+        # "auto" for active_downloads * penguin threads. Threads are split
+        # between downloads by their remaining bytes
+        "max_workers": "auto",
+        # Maximum download speed between all active downloads in bytes
+        # per second, 0 to disable
+        "max_bandwidth": 0,
+        # Number of downloads remuxed at the same time, downloads waiting to be
+        # remuxed don't take a download slot. 0 to remux downloads in their
+        # download slot
+        "remux_workers": 2,
+        # Maximum extracted items waiting to be downloaded, extractors wait
+        # when it's full, 0 for unlimited
+        "queue_size": 20,
         # Output directory for series
         "series_directory": f"{__download_path}/Series".replace("\\", "/"),
         # Output directory for movies
@@ -53,6 +67,32 @@ config = {
         "penguin": {
             "attempts": 3,
             "threads": 5,
+            # Segment download engine, possible values:
+            # threads, asyncio (requires the aiohttp module)
+            "engine": "threads",
+            # Maximum concurrent segment requests using the asyncio engine
+            "connections": 50,
+            # Size in bytes of the chunks segments are written to disk in,
+            # this is the maximum amount of segment data kept in memory
+            # by each download worker
+            "chunk_size": 65536,
+            # Write byte ranges of files directly to the output file at their
+            # offset, instead of downloading them separately and merging them
+            "direct_write": True,
+            # Download segments using HTTP/2 with the threads engine, requires
+            # the httpx and h2 modules
+            "http2": False,
+            # Start remuxing while segments are still being downloaded, feeding
+            # them to ffmpeg through named pipes, only available on POSIX
+            # systems for unencrypted m3u8 video and audio tracks
+            "pipelined_remux": False,
+            # Size in bytes of the first byte range of a file, the following
+            # ranges grow or shrink depending on the throughput and latency
+            # of previous range requests
+            "range_size": 1048576,
+            "max_range_size": 67108864,
+            # Maximum bytes of byte ranges being downloaded at the same time
+            "max_inflight_bytes": 268435456,
             # Add a metadata entry with the Polarity version
             "tag_output": False,
             # Copy download logs to final download path
@@ -86,6 +126,12 @@ config = {
     "extractor": {
         # Number of extraction threads, one per URL
         "active_extractions": 5,
+        # Concurrent requests of an extraction when fetching seasons and
+        # episodes, 1 to fetch them one by one
+        "fetch_workers": 8,
+        # Request the streams of an episode or movie once it's download
+        # starts, instead of while extracting
+        "lazy_streams": True,
         # Extractor's defaults
         "atresplayer": {
             # Prefer HEVC codec if available
@@ -133,6 +179,41 @@ config = {
         # https://github.com/aveeryy/Polarity/tree/main/polarity/docs/format.md
         "result_format": "{n} ({I})",
     },
+    # HTTP client options
+    "http": {
+        # Number of hosts to keep a connection pool for
+        "pool_connections": 10,
+        # Connections kept open per host, "auto" to fit every concurrent
+        # request (active extractions * fetch workers + max workers)
+        "pool_maxsize": "auto",
+        # Give every thread it's own session, instead of sharing one between
+        # all extraction and download threads
+        "per_thread_sessions": False,
+        # Maximum requests and bytes per second to a single host, 0 to
+        # disable. "api" limits apply to extractor requests and "cdn" limits
+        # to segment downloads
+        "rate_limits": {
+            "api": {"requests": 0, "bytes": 0},
+            "cdn": {"requests": 0, "bytes": 0},
+        },
+        # On-disk cache of extractor API responses, like series, season
+        # and episode information. Stream requests are never cached
+        "cache": {
+            "enabled": True,
+            # Maximum size of the cache in bytes, the least recently used
+            # responses are removed first
+            "max_size": 67108864,
+            # Seconds responses are fresh for, by endpoint class. After that
+            # they're revalidated using their ETag or Last-Modified headers
+            "ttl": {
+                "series": 86400,
+                "season": 86400,
+                # Lists of episodes, shorter since new episodes get added
+                "episodes": 3600,
+                "episode": 86400,
+            },
+        },
+    },
 }
 
 # Default paths
@@ -141,8 +222,11 @@ paths = {
     for k, v in {
         "account": "Accounts/",
         "bin": "Binaries/",
+        "cache": "Cache/",
         "cfg": "config.toml",
         "dl_log": "download.log",
+        # State of the series synced with the sync action
+        "sync_state": "sync.json",
         "dump": "Dumps/",
         "log": "Logs/",
         "tmp": "Temp/",
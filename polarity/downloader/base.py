@@ -19,6 +19,8 @@ class BaseDownloader(Thread):
 
         from polarity.config import options, paths
 
+        self.item = item
+        # Streams are resolved once the download starts
         self.streams = item.streams
         if _options is None:
             _options = {}
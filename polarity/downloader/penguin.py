@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 import re
@@ -5,42 +6,91 @@ import subprocess
 import sys
 import threading
 import zipfile
+from contextlib import contextmanager
 from copy import deepcopy
-from dataclasses import asdict
-from random import choice
+from dataclasses import asdict, replace
+from datetime import timedelta
 from shutil import move
-from time import sleep
-from typing import List
+from time import sleep, time
+from typing import AsyncIterator, Iterable, Iterator, List, Tuple
 from urllib.parse import unquote
 
 from polarity.lang import lang
 from polarity.downloader.base import BaseDownloader
 from polarity.downloader.protocols import ALL_PROTOCOLS
+from polarity.downloader.protocols.file import FileProtocol, range_stats
+from polarity.downloader.resume import ResumeJournal, SegmentSet
+from polarity.downloader.scheduler import SegmentScheduler, download_budget
 from polarity.types import Content, ProgressBar, Thread
 from polarity.types.ffmpeg import AUDIO, SUBTITLES, VIDEO, FFmpegCommand, FFmpegInput
 from polarity.types.stream import ContentKey, M3U8Pool, Segment, SegmentPool, Stream
 from polarity.utils import (
+    copy_file_data,
     dict_merge,
+    exit_if_no_space,
     get_extension,
     mkfile,
+    preallocate,
+    rate_limiter,
     request_webpage,
     strip_extension,
     thread_vprint,
     vprint,
+    write_at,
+    write_chunks,
 )
 from polarity.version import __version__
 
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import httpx
+
+    # Required by httpx for HTTP/2 support
+    import h2  # noqa: F401
+except ImportError:
+    httpx = None
+
+# Available segment download engines
+ENGINES = ("threads", "asyncio")
+
 
 class PenguinDownloader(BaseDownloader):
 
     thread_lock = threading.Lock()
     _SIGNAL = {}
+    # Notified every time a signal is set or cleared
+    _signal_changed = threading.Condition()
 
     def __init__(self, item: Content, _options=None, _thread_id: int = 0) -> None:
         super().__init__(item, _options, _thread_id)
 
         self.threads = []
         self.stopped = False
+        self.data_lock = threading.Lock()
+        # File descriptors of the pools' output files, for direct writes
+        self.output_files = {}
+        # HTTP/2 client used by the segment download threads
+        self.http2_client = None
+        # Segment download engine, picked when the download starts
+        self.engine = None
+        # Number of segment download threads not stopping
+        self.active_workers = 0
+        # Number of segment download threads not finished
+        self.running_workers = 0
+        self.worker_lock = threading.Lock()
+        # Notified every time a segment is downloaded
+        self.segment_condition = threading.Condition()
+        # Set once the segment download phase ends
+        self.segments_done = threading.Event()
+        self.ffmpeg = None
+        # Return once segments are downloaded, leaving the remux to a call
+        # to remux() from another thread
+        self.defer_remux = False
+        self.remux_pending = False
 
         self.download_data = {
             "content_identifier": "",
@@ -54,7 +104,7 @@ class PenguinDownloader(BaseDownloader):
             },
             "downloaded_bytes": 0,
             "total_bytes": 0,
-            "downloaded_segments": [],
+            "downloaded_segments": SegmentSet(),
             "total_segments": 0,
             "remux_done": False,
         }
@@ -85,6 +135,9 @@ class PenguinDownloader(BaseDownloader):
 
         # lock the download
         self._lock()
+        # Downloaded segments are appended here, and compacted into the
+        # download data file on load and once the download finishes
+        self.journal = ResumeJournal(f"{self.temp_path}/segments.journal")
 
         # Check if the download can be resumed from a previous session
         if os.path.exists(f"{self.temp_path}/data.json"):
@@ -112,14 +165,51 @@ class PenguinDownloader(BaseDownloader):
                 )
                 self.download_data = download_data
                 can_resume = True
+                # Merge the journal entries into the download data file
+                self.save_download_data()
+
+        self.engine = self.get_engine()
+        vprint(
+            lang["penguin"]["using_engine"] % self.engine,
+            module_name="penguin",
+            level="debug",
+            extra_loggers=[self.logger],
+        )
+        download_budget.set_limits(*self.get_budget_limits())
+        if self.engine != "asyncio":
+            # Registered before processing the streams to size the byte ranges
+            # from the download's share of the workers. The asyncio engine
+            # uses a fixed number of connections, it doesn't take a share
+            download_budget.register(self, self._remaining_bytes())
 
         if not can_resume:
-            # We either can't resume or it's a new download
+            # We either can't resume or it's a new download, get the streams
+            # if the extractor deferred it
+            self.streams = self.item.resolve_streams()
             for stream in self.streams:
                 for pool in self.process_stream(stream):
                     # get an identifier for the segment pool
                     identifier = self.generate_pool_id(pool.media_type)
                     pool.set_id(identifier)
+                    if not self._can_direct_write(pool):
+                        # Download byte ranges to separate files and merge them
+                        pool.output_size = None
+                    if (
+                        pool.pool_type == "file"
+                        and pool.segments
+                        and pool.segments[0].byte_range
+                    ):
+                        sizes = [
+                            FileProtocol.range_size(segment.byte_range)
+                            for segment in pool.segments
+                        ]
+                        vprint(
+                            lang["penguin"]["range_sizes"]
+                            % (pool._id, len(sizes), min(sizes), max(sizes)),
+                            "debug",
+                            "penguin",
+                            extra_loggers=[self.logger],
+                        )
                     if pool.pool_type == M3U8Pool:
                         # Create a m3u8 playlist to later merge the segments
                         playlist = self.create_m3u8_playlist(pool)
@@ -133,15 +223,9 @@ class PenguinDownloader(BaseDownloader):
             # Save pools to file
             self.save_download_data()
 
-        self._segment_pools = deepcopy(self.download_data["segment_pools"])
-
-        # Create segment downloaders
-        vprint(
-            lang["penguin"]["threads_started"] % (self.options["penguin"]["threads"]),
-            module_name="penguin",
-            level="debug",
-            extra_loggers=[self.logger],
-        )
+        # The scheduler modifies the pools' state, use a copy to avoid saving it
+        self.scheduler = SegmentScheduler(deepcopy(self.download_data["segment_pools"]))
+        self._open_output_files()
 
         self.progress_bar = ProgressBar(
             head="download",
@@ -163,23 +247,52 @@ class PenguinDownloader(BaseDownloader):
             },
         )
 
-        # Create the download threads
-        for i in range(self.options["penguin"]["threads"]):
-            thread_name = f"{threading.current_thread().name}/{i}"
-            thread = Thread(target=self.segment_downloader, name=thread_name, daemon=True)
-            self.threads.append(thread)
-            thread.start()
+        download_start = time()
 
-        # Wait until threads stop
-        while True:
-            # Check if seg. downloaders have finished
-            if not [t for t in self.threads if t.is_alive()]:
-                self.progress_bar.close()
-                if self.stopped:
-                    return
-                self.download_data["download_finished"] = True
-                break
-            sleep(1)
+        if self._can_pipeline_remux():
+            # Start remuxing while the segments are being downloaded
+            self.start_remux(pipelined=True)
+
+        if self.engine == "asyncio":
+            asyncio.run(self.async_segment_downloader())
+        else:
+            self.http2_client = self.get_http2_client()
+            # Create download threads as the download's share of the budget
+            # grows, threads stop themselves when it shrinks
+            while True:
+                version = download_budget.version
+                if not self.running_workers and (
+                    self.stopped or not self.scheduler.pending
+                ):
+                    break
+                download_budget.update(self, self._remaining_bytes())
+                if not self.stopped and self.scheduler.pending:
+                    self._create_workers(download_budget.allocation(self))
+                # Wait until a worker exits or the budget changes
+                download_budget.wait(version)
+            if self.http2_client is not None:
+                self.http2_client.close()
+        download_budget.unregister(self)
+
+        self._close_output_files()
+        self.journal.close()
+        self.progress_bar.close()
+        with self.segment_condition:
+            self.segments_done.set()
+            self.segment_condition.notify_all()
+        if self.stopped:
+            if self.ffmpeg is not None:
+                self.ffmpeg.kill()
+            return
+        self.download_data["download_finished"] = True
+        self.save_download_data()
+        vprint(
+            lang["penguin"]["debug_time_download"]
+            % timedelta(seconds=time() - download_start),
+            module_name="penguin",
+            level="debug",
+            extra_loggers=[self.logger],
+        )
 
         self._execute_hooks(
             "download_progress",
@@ -189,59 +302,45 @@ class PenguinDownloader(BaseDownloader):
             },
         )
 
-        self.temp_files = os.scandir(self.temp_path)
+        if self.defer_remux:
+            # The remux is done by whoever started the downloader
+            self.remux_pending = True
+            return
+        return self.remux()
+
+    def remux(self) -> bool:
+        """
+        Remuxes the downloaded tracks into the output file and removes the
+        temporary files, called once the segment download has finished
+
+        :return: True if the remux has succeeded
+        """
+        self.remux_pending = False
+        self.temp_files = list(os.scandir(self.temp_path))
         if not self.download_data["remux_done"]:
-            remux_path = f"{self.temp_path}{get_extension(self.output)}"
-            # Remux all the tracks together
-            command = self.generate_ffmpeg_command()
-            # Merge segments
-            for pool in self.download_data["segment_pools"]:
-                if pool.pool_type != "file":
-                    continue
-                self.merge_segments(pool)
-            # Copy the environment and add a FFREPORT variable to it
-            environ = os.environ.copy()
-            log_path = os.path.join(self.temp_path, "ffmpeg.log")
-            if sys.platform == "win32":
-                # I truly fucking hate windows
-                log_path = log_path.replace("\\", "/\\")
-                log_path = log_path.replace(":", "\\:")
-            environ["FFREPORT"] = f"file={log_path}"
-            # Create a watchdog thread and start it
-            watchdog = Thread("__FFmpeg_Watchdog", target=self.ffmpeg_watchdog)
-            watchdog.start()
-            # Run ffmpeg and wait until watchdog has returned
-            try:
-                subprocess.run(command, env=environ, check=True)
-            except subprocess.CalledProcessError as ex:
+            if self.ffmpeg is not None and self.ffmpeg.wait() != 0:
+                # Remux again from the downloaded files
                 vprint(
-                    lang["penguin"]["ffmpeg_remux_failed"]
-                    % f"{self.temp_path}/debug_info.zip",
-                    "exception",
+                    lang["penguin"]["pipelined_remux_failed"],
+                    "warning",
                     "penguin",
                     extra_loggers=[self.logger],
                 )
-
-                # Create a zip file with the files necessary for debugging
-                debug_zip = zipfile.ZipFile(f"{self.temp_path}/debug_info.zip", "w")
-                for file in ("data.json", "ffmpeg.log"):
-                    debug_zip.write(f"{self.temp_path}/{file}", file)
-                debug_zip.close()
-
-                # create a traceback
-                self._execute_hooks(
-                    "download_error", {"signal": "remux_failed", "exception": ex}
-                )
-                # Since remux failed, remove the file created by ffmpeg
-                # if it does exist, since it can be incomplete or/and broken
-                if os.path.exists(remux_path):
-                    os.remove(remux_path)
-                self.download_data["remux_done"] = False
-                self.save_download_data()
+                # Close the failed remux's progress bar, the next remux
+                # creates it's own
+                self.watchdog.join()
+                self.remux_bar.close()
+                self.ffmpeg = None
+            if self.ffmpeg is None:
+                # Merge segments
+                for pool in self.download_data["segment_pools"]:
+                    # Pools with an output size have been written to the output file
+                    if pool.pool_type != "file" or pool.output_size is not None:
+                        continue
+                    self.merge_segments(pool)
+                self.start_remux()
+            if not self.wait_remux():
                 return False
-
-            while watchdog.is_alive():
-                sleep(0.1)
             self.download_data["remux_done"] = True
             self.save_download_data()
             self._execute_hooks("download_progress", {"signal": "remux_finished"})
@@ -258,7 +357,7 @@ class PenguinDownloader(BaseDownloader):
             "download_progress", {"signal": "download_finished", "output": self.output}
         )
         if self.options["penguin"]["keep_logs"]:
-            for log in ("download.log", "ffmpeg.log", "remux.log"):
+            for log in ("download.log", "ffmpeg.log"):
                 move_to = self.output.replace(get_extension(self.output), f"_{log}")
                 if os.path.exists(f"{self.temp_path}/{log}"):
                     move(f"{self.temp_path}/{log}", move_to)
@@ -266,8 +365,143 @@ class PenguinDownloader(BaseDownloader):
         for file in os.scandir(self.temp_path):
             os.remove(file.path)
         os.rmdir(f"{self.temp_path}")
-        # TODO: probably would be better to replace this with a return
         self.success = True
+        return True
+
+    def start_remux(self, pipelined: bool = False) -> None:
+        """
+        Starts remuxing all the tracks together with ffmpeg
+
+        :param pipelined: Feed the tracks to ffmpeg through named pipes, as
+        their segments get downloaded
+        """
+        pipes = {}
+        if pipelined:
+            for pool in self.download_data["segment_pools"]:
+                pipes[pool._id] = f"{self.temp_path}/{pool._id}.pipe"
+                if not os.path.exists(pipes[pool._id]):
+                    os.mkfifo(pipes[pool._id])
+                Thread(
+                    "__Remux_Feeder",
+                    target=self._feed_pipe,
+                    args=(pool, pipes[pool._id]),
+                    daemon=True,
+                ).start()
+        command = self.generate_ffmpeg_command(pipes)
+        # Copy the environment and add a FFREPORT variable to it
+        environ = os.environ.copy()
+        log_path = os.path.join(self.temp_path, "ffmpeg.log")
+        if sys.platform == "win32":
+            # I truly fucking hate windows
+            log_path = log_path.replace("\\", "/\\")
+            log_path = log_path.replace(":", "\\:")
+        environ["FFREPORT"] = f"file={log_path}"
+        # Remux progress is written to stdout
+        self.ffmpeg = subprocess.Popen(
+            command, env=environ, stdout=subprocess.PIPE, text=True
+        )
+        # Create a watchdog thread and start it
+        self.watchdog = Thread(
+            "__FFmpeg_Watchdog", target=self.ffmpeg_watchdog, args=(self.ffmpeg,)
+        )
+        self.watchdog.start()
+
+    def wait_remux(self) -> bool:
+        """
+        Waits until ffmpeg finishes remuxing
+
+        :return: True if the remux has succeeded
+        """
+        if self.ffmpeg.wait() != 0:
+            ex = subprocess.CalledProcessError(self.ffmpeg.returncode, self.ffmpeg.args)
+            vprint(
+                lang["penguin"]["ffmpeg_remux_failed"]
+                % f"{self.temp_path}/debug_info.zip",
+                "exception",
+                "penguin",
+                extra_loggers=[self.logger],
+            )
+
+            # Create a zip file with the files necessary for debugging
+            debug_zip = zipfile.ZipFile(f"{self.temp_path}/debug_info.zip", "w")
+            for file in ("data.json", "ffmpeg.log"):
+                debug_zip.write(f"{self.temp_path}/{file}", file)
+            debug_zip.close()
+
+            # create a traceback
+            self._execute_hooks(
+                "download_error", {"signal": "remux_failed", "exception": ex}
+            )
+            # Since remux failed, remove the file created by ffmpeg
+            # if it does exist, since it can be incomplete or/and broken
+            remux_path = f"{self.temp_path}{get_extension(self.output)}"
+            if os.path.exists(remux_path):
+                os.remove(remux_path)
+            self.download_data["remux_done"] = False
+            self.save_download_data()
+            return False
+
+        self.watchdog.join()
+        return True
+
+    def _can_pipeline_remux(self) -> bool:
+        """
+        Returns True if pipelined remux is enabled and possible, only
+        unencrypted m3u8 video and audio tracks can be fed to ffmpeg
+        """
+        if (
+            not self.options["penguin"]["pipelined_remux"]
+            or self.download_data["remux_done"]
+        ):
+            return False
+        unsupported = [
+            pool._id
+            for pool in self.download_data["segment_pools"]
+            if pool.pool_type != M3U8Pool
+            or pool.media_type == "subtitles"
+            or any(self._is_encrypted(s) for s in pool.segments)
+        ]
+        if unsupported or not hasattr(os, "mkfifo"):
+            vprint(
+                lang["penguin"]["pipelined_remux_unsupported"] % ", ".join(unsupported),
+                "debug",
+                "penguin",
+                extra_loggers=[self.logger],
+            )
+            return False
+        return True
+
+    @staticmethod
+    def _is_encrypted(segment: Segment) -> bool:
+        return segment.key is not None and segment.key["video"] is not None
+
+    def _feed_pipe(self, pool: SegmentPool, path: str) -> None:
+        """
+        Writes a pool's segments to a named pipe read by ffmpeg, in order,
+        as soon as they're downloaded
+        """
+        # Initialization segments go first
+        segments = sorted(pool.segments, key=lambda s: not s.init)
+        downloaded = self.download_data["downloaded_segments"]
+        try:
+            # Blocks until ffmpeg opens the pipe
+            with open(path, "wb") as pipe:
+                for segment in segments:
+                    with self.segment_condition:
+                        self.segment_condition.wait_for(
+                            lambda: segment._id in downloaded
+                            or self.segments_done.is_set()
+                        )
+                    segment_path = f"{self.temp_path}/{segment._filename}"
+                    if not os.path.exists(segment_path):
+                        # Segment has failed to download
+                        continue
+                    with open(segment_path, "rb") as part:
+                        for _ in copy_file_data(part, pipe):
+                            pass
+        except BrokenPipeError:
+            # ffmpeg has exited
+            return
 
     def merge_segments(self, pool: SegmentPool):
         files = {f.name: f for f in self.temp_files if f"{pool._id}_" in f.name}
@@ -282,27 +516,52 @@ class PenguinDownloader(BaseDownloader):
             leave=False,
         )
         merge_to = f"{self.temp_path}/{pool._id}{pool.get_ext_from_segment()}"
-        with open(merge_to, "ab") as final:
+        merge_start = time()
+        # Continue an interrupted merge, the file can't be opened in append
+        # mode since kernel copies don't support it
+        with open(merge_to, "r+b" if os.path.exists(merge_to) else "wb") as final:
+            final.seek(0, os.SEEK_END)
             for segment in pool.segments:
                 segment_path = f"{self.temp_path}/{segment._filename}"
                 if not os.path.exists(segment_path):
                     continue
                 with open(segment_path, "rb") as part:
-                    final.write(part.read())
-                # update the progress bar
-                if segment._filename in files:
-                    progress_bar.update(files[segment._filename].stat().st_size)
+                    for copied in copy_file_data(part, final):
+                        progress_bar.update(copied)
                 os.remove(segment_path)
         progress_bar.close()
+        elapsed = time() - merge_start
+        vprint(
+            lang["penguin"]["debug_time_merge"]
+            % (
+                pool._id,
+                timedelta(seconds=elapsed),
+                total_size / max(elapsed, 0.001) / 1024**2,
+            ),
+            module_name="penguin",
+            level="debug",
+            extra_loggers=[self.logger],
+        )
 
     def save_download_data(self) -> None:
-        """Saves the download resume information"""
+        """
+        Saves the download resume information, segments downloaded since the
+        last save are moved from the journal to the download data file
+        """
         # Clone the output data dictionary
         data = deepcopy(self.download_data)
         # Convert segment pools to dictionaries
         data["segment_pools"] = [asdict(p) for p in data["segment_pools"]]
         data["inputs"] = [asdict(p) for p in data["inputs"]]
-        mkfile(f"{self.temp_path}/data.json", json.dumps(data, indent=4), overwrite=True)
+        data["downloaded_segments"] = data["downloaded_segments"].serialize()
+        # Write to a temporal file first, a crash while saving must leave
+        # either the old or the new data intact, since the journal is emptied
+        write_chunks(
+            f"{self.temp_path}/data.json",
+            [json.dumps(data, indent=4).encode()],
+            overwrite=True,
+        )
+        self.journal.truncate()
 
     def load_download_data(self) -> dict:
         with open(f"{self.temp_path}/data.json", "r") as f:
@@ -352,6 +611,15 @@ class PenguinDownloader(BaseDownloader):
             inputs.append(inp)
         output["segment_pools"] = pools
         output["inputs"] = inputs
+        output["downloaded_segments"] = SegmentSet.deserialize(
+            output["downloaded_segments"]
+        )
+        # Add the segments downloaded after the last save
+        for segment_id, size in self.journal.read():
+            if segment_id in output["downloaded_segments"]:
+                continue
+            output["downloaded_segments"].add(segment_id)
+            output["downloaded_bytes"] += size
         return output
 
     def _recreate_resume_stats(self) -> dict:
@@ -363,20 +631,34 @@ class PenguinDownloader(BaseDownloader):
         stats = {
             "downloaded_bytes": 0,
             "total_bytes": 0,
-            "downloaded_segments": [],
+            "downloaded_segments": SegmentSet(),
         }
         for file in os.scandir(self.temp_path):
-            if get_extension(file.name) in (".m3u8", ".json", ".log", ".zip", ""):
+            if get_extension(file.name) in (
+                ".m3u8",
+                ".json",
+                ".journal",
+                ".log",
+                ".pipe",
+                ".zip",
+                ".key",
+                ".part",
+                "",
+            ):
                 # Avoid adding remux playlists, logs or other files to the byte count
                 continue
-            stats["downloaded_segments"].append(strip_extension(file.name))
+            if "_" not in strip_extension(file.name):
+                # Output file of a pool written directly, it's not possible to
+                # know which byte ranges have been downloaded
+                continue
+            stats["downloaded_segments"].add(strip_extension(file.name))
             stats["downloaded_bytes"] += file.stat().st_size
 
         # Calculate total bytes
-        stats["total_bytes"] = (
-            stats["downloaded_bytes"]
-            / len(stats["downloaded_segments"])
-            * self.download_data["total_segments"]
+        stats["total_bytes"] = self.calculate_final_size(
+            stats["downloaded_bytes"],
+            len(stats["downloaded_segments"]),
+            self.download_data["total_segments"],
         )
         return stats
 
@@ -411,6 +693,10 @@ class PenguinDownloader(BaseDownloader):
             "penguin",
             extra_loggers=[self.logger],
         )
+        # The asyncio engine uses a fixed number of connections instead
+        workers = None
+        if self.engine != "asyncio":
+            workers = download_budget.allocation(self)
         for protocol in ALL_PROTOCOLS:
             if not re.match(protocol.SUPPORTED_EXTENSIONS, get_extension(stream.url)):
                 continue
@@ -419,7 +705,9 @@ class PenguinDownloader(BaseDownloader):
                 "debug",
                 extra_loggers=[self.logger],
             )
-            pools = protocol(stream=stream, options=self.options).process()
+            pools = protocol(
+                stream=stream, options=self.options, workers=workers
+            ).process()
             if pools and pools[0].pool_type == "file":
                 # Since FileProtocol can't differenciate file types
                 # asign media type based on stream extra_* parameters
@@ -571,18 +859,14 @@ class PenguinDownloader(BaseDownloader):
     # Post-processing #
     ###################
 
-    def ffmpeg_watchdog(self):
+    def ffmpeg_watchdog(self, process: subprocess.Popen):
         """
         Watch FFmpeg merge progress
 
+        :param process: The ffmpeg process
         :return: Nothing
         """
 
-        stats = {
-            "total_size": 0,  # current remux size
-            "progress": "continue",  # current actoin
-        }
-
         last_update = 0
         self.remux_bar = ProgressBar(
             head="remux",
@@ -592,34 +876,20 @@ class PenguinDownloader(BaseDownloader):
             leave=False,
             total=self.download_data["downloaded_bytes"],
         )
-        # Wait until file is created
-        while not os.path.exists(f"{self.temp_path}/remux.log"):
-            sleep(0.5)
-        while stats["progress"] == "continue":
-            with open(f"{self.temp_path}/remux.log", "r") as f:
-                try:
-                    # Read the last 15 lines
-                    data = f.readlines()[-15:]
-                    for i in ("total_size", "progress"):
-                        pattern = re.compile(f"{i}=(.+)")
-                        # Find all matches
-                        matches = re.findall(pattern, "\n".join(data))
-                        # Get the most recent one
-                        stats[i] = matches[-1].split(".")[0]
-                except IndexError:
-                    sleep(0.2)
-                    continue
+        # Returns once ffmpeg closes it's stdout
+        for stats in parse_ffmpeg_progress(process.stdout):
             self._execute_hooks(
                 "download_progress", {"signal": "remux_progress", **stats}
             )
             self.remux_bar.update(int(stats["total_size"]) - last_update)
             last_update = int(stats["total_size"])
-            sleep(0.5)
 
-    def generate_ffmpeg_command(self) -> list:
+    def generate_ffmpeg_command(self, pipes: dict = None) -> list:
         """
         Generates a ffmpeg command from the output data's inputs
 
+        :param pipes: Dict with pool identifiers as keys and the path of a
+        named pipe to read the pool's data from instead of it's input file
         :return: The ffmpeg command as a list
         """
         # Merge segments
@@ -634,7 +904,7 @@ class PenguinDownloader(BaseDownloader):
             ],
             metadata_arguments=[
                 "-progress",
-                f"{self.temp_path}/remux.log",
+                "pipe:1",
             ],
         )
 
@@ -643,47 +913,161 @@ class PenguinDownloader(BaseDownloader):
                 ["-metadata", f"POLARITY_VERSION=Polarity {__version__} with Penguin"]
             )
 
-        command.extend(self.download_data["inputs"])
+        inputs = self.download_data["inputs"]
+        if pipes:
+            inputs = [
+                replace(_input, path=pipes[pool._id])
+                for pool, _input in zip(self.download_data["segment_pools"], inputs)
+            ]
+        command.extend(inputs)
 
         return command.build()
 
-    def segment_downloader(self):
+    def get_engine(self) -> str:
         """
-        ## Segment downloader
+        Returns the segment download engine to use, falls back to the thread
+        engine if the configured one is invalid or can't be used
+        """
+        engine = self.options["penguin"]["engine"]
+        if engine not in ENGINES:
+            vprint(
+                lang["penguin"]["invalid_engine"] % engine,
+                "warning",
+                "penguin",
+                extra_loggers=[self.logger],
+            )
+            return "threads"
+        if engine == "asyncio" and aiohttp is None:
+            vprint(
+                lang["penguin"]["missing_aiohttp"],
+                "warning",
+                "penguin",
+                extra_loggers=[self.logger],
+            )
+            return "threads"
+        return engine
 
-        First, takes tries to take an unreserved segment pool; if
-        all pools have already been reserved by other threads, take one at random
+    def get_budget_limits(self) -> Tuple[int, int]:
+        """
+        :return: The maximum segment workers and bandwidth of all downloads
+        """
+        workers = self.options["max_workers"]
+        if workers == "auto":
+            workers = int(self.options["active_downloads"]) * int(
+                self.options["penguin"]["threads"]
+            )
+        return int(workers), int(self.options["max_bandwidth"])
 
-        Then pops a segment from the pool and attempts to download it, if successful,
-        writes it's data into a file and updates the progress bar among other stuff
+    def _remaining_bytes(self) -> int:
+        """Estimated bytes left to download, None if still unknown"""
+        if not self.download_data["total_bytes"]:
+            return
+        return max(
+            self.download_data["total_bytes"] - self.download_data["downloaded_bytes"], 0
+        )
+
+    def _create_workers(self, allocation: int) -> None:
+        """Creates download threads until reaching the allocated number"""
+        with self.worker_lock:
+            missing = allocation - self.active_workers
+            if missing <= 0:
+                return
+            self.active_workers += missing
+            self.running_workers += missing
+        vprint(
+            lang["penguin"]["threads_started"] % missing,
+            module_name="penguin",
+            level="debug",
+            extra_loggers=[self.logger],
+        )
+        for _ in range(missing):
+            thread_name = f"{threading.current_thread().name}/{len(self.threads)}"
+            thread = Thread(target=self._segment_worker, name=thread_name, daemon=True)
+            self.threads.append(thread)
+            thread.start()
+
+    def _segment_worker(self) -> None:
+        stopped_by_budget = False
+        try:
+            stopped_by_budget = self.segment_downloader()
+        finally:
+            with self.worker_lock:
+                if not stopped_by_budget:
+                    self.active_workers -= 1
+                self.running_workers -= 1
+            download_budget.notify()
+
+    def _over_budget(self) -> bool:
+        """
+        Returns True, and stops counting the calling thread as a worker, if
+        the download has more workers than allocated by the budget
+        """
+        with self.worker_lock:
+            if self.active_workers <= download_budget.allocation(self):
+                return False
+            self.active_workers -= 1
+            return True
+
+    def get_http2_client(self):
+        """
+        Returns a HTTP/2 client for the segment download threads if enabled,
+        requests to the same host are multiplexed over a single connection
+        """
+        if not self.options["penguin"]["http2"]:
+            return
+        if httpx is None:
+            vprint(
+                lang["penguin"]["missing_httpx"],
+                "warning",
+                "penguin",
+                extra_loggers=[self.logger],
+            )
+            return
+
+        from polarity.utils import session
+
+        return httpx.Client(
+            http2=True,
+            headers=dict(session.headers),
+            timeout=15,
+            follow_redirects=True,
+        )
+
+    def get_pool(self, worker_name: str) -> SegmentPool:
+        """
+        Takes a segment pool from the scheduler, if all pools have already
+        been reserved by other workers, assists the one with most pending segments
+
+        :param worker_name: Name of the worker taking the pool
+        :return: A SegmentPool, or None if all pools are finished
+        """
+        pool = self.scheduler.get_pool(worker_name)
+        if pool is not None and pool._reserved_by != worker_name:
+            thread_vprint(
+                lang["penguin"]["assisting"] % (pool._reserved_by, pool._id),
+                level="verbose",
+                module_name=worker_name,
+                extra_loggers=[self.logger],
+                lock=self.thread_lock,
+            )
+        return pool
+
+    def segment_downloader(self) -> bool:
         """
+        ## Segment downloader
 
-        def get_pool() -> SegmentPool:
-            def get_unfinished_pools() -> List[SegmentPool]:
-                return [p for p in self._segment_pools if not p._finished]
+        First, takes tries to take an unreserved segment pool; if all pools
+        have already been reserved by other threads, assist the busiest one
 
-            def get_unreserved_pools() -> List[SegmentPool]:
-                return [p for p in self._segment_pools if not p._reserved]
+        Then pops a segment from the pool and attempts to download it, if successful,
+        writes it's data into a file and updates the progress bar among other stuff
 
-            unfinished = get_unfinished_pools()
-            pools = get_unreserved_pools()
-            if not unfinished:
-                return
-            if not pools:
-                pool = choice(unfinished)
-                thread_vprint(
-                    lang["penguin"]["assisting"] % (pool._reserved_by, pool._id),
-                    level="verbose",
-                    module_name=thread_name,
-                    extra_loggers=[self.logger],
-                    lock=self.thread_lock,
-                )
-                return pool
-            pools[0]._reserved = True
-            pools[0]._reserved_by = thread_name
-            return pools[0]
+        :return: True if the thread has stopped since the download is using
+        more threads than allocated by the download budget
+        """
 
         thread_name = threading.current_thread().name
+        chunk_size = int(self.options["penguin"]["chunk_size"])
 
         thread_vprint(
             message=lang["penguin"]["thread_started"] % thread_name,
@@ -695,7 +1079,7 @@ class PenguinDownloader(BaseDownloader):
 
         while True:
             # Grab a segment pool
-            pool = get_pool()
+            pool = self.get_pool(thread_name)
 
             if pool is None:
                 return
@@ -708,42 +1092,21 @@ class PenguinDownloader(BaseDownloader):
                 lock=self.thread_lock,
             )
             while True:
-                if not pool.segments:
-                    pool._finished = True
+                segment = self.scheduler.next_segment(pool)
+                if segment is None:
                     break
-                segment = pool.segments.pop(0)
-                segment_path = f"{self.temp_path}/{segment._filename}"
-                if segment._id in self.download_data["downloaded_segments"]:
-                    # segment has already been downloaded, skip
-                    thread_vprint(
-                        message=lang["penguin"]["segment_skip"] % segment._id,
-                        module_name=thread_name,
-                        level="verbose",
-                        extra_loggers=[self.logger],
-                        lock=self.thread_lock,
-                    )
+                if self._skip_segment(segment, thread_name):
                     continue
 
-                thread_vprint(
-                    message=lang["penguin"]["segment_start"] % segment._id,
-                    module_name=thread_name,
-                    level="verbose",
-                    extra_loggers=[self.logger],
-                    lock=self.thread_lock,
-                )
-
-                size = 0
-
                 for i in range(self.options["penguin"]["attempts"]):
+                    request_start = time()
                     try:
-                        segment_data = request_webpage(
-                            segment.url,
-                            method="get",
-                            timeout=15,
-                            headers={"range": f"bytes={segment.byte_range}"}
-                            if segment.byte_range is not None
-                            else {},
-                        )
+                        with self._open_segment(segment, chunk_size) as segment_data:
+                            latency = time() - request_start
+                            # Write fragment data to file as it arrives
+                            size = self._write_segment(
+                                segment, self._segment_chunks(segment, segment_data)
+                            )
                         # TODO: better exception handling
                         # TODO: better messaging, add retries
                     except BaseException as ex:
@@ -757,67 +1120,344 @@ class PenguinDownloader(BaseDownloader):
                         )
                         sleep(0.5)
                         continue
-                    if "Content-Length" in segment_data.headers:
-                        size = int(segment_data.headers["Content-Length"])
-                    segment_contents = segment_data.content
-
-                    if (
-                        segment._ext == ".vtt"
-                        and self.options["penguin"]["tweaks"]["atresplayer_subtitle_fix"]
-                    ):
-                        segment_contents = self.fix_vtt(segment_contents)
-                    # TODO: better ttml2 implementation, since previous
-                    # one can lose formatting
-
-                    # Write fragment data to file
-                    mkfile(segment_path, segment_contents, False, "wb")
-                    thread_vprint(
-                        lang["penguin"]["segment_downloaded"] % segment._id,
-                        level="verbose",
-                        module_name=thread_name,
-                        extra_loggers=[self.logger],
-                        lock=self.thread_lock,
-                    )
-                    segment._finished = True
-
-                    self._execute_hooks(
-                        "download_progress",
-                        {
-                            "signal": "downloaded_segment",
-                            "content": self.content["extended"],
-                            "segment": segment._id,
-                            "size": size,
-                        },
-                    )
+                    if segment.byte_range is not None:
+                        range_stats.record(size, latency, time() - request_start)
+                    self._notify_segment(segment, size, thread_name)
 
                     # handle signaling
-                    signals = self.check_signal()
+                    if self._process_signals(thread_name):
+                        return
+                    break
+
+                if self._over_budget():
+                    return True
+
+    async def async_segment_downloader(self) -> None:
+        """
+        ## Asynchronous segment downloader
+
+        Same as `segment_downloader`, but instead of using a thread per
+        worker, runs every worker as a coroutine in a single event loop,
+        allowing a lot more concurrent segment requests without the thread
+        overhead. Requires the aiohttp module
+        """
+
+        from polarity.utils import session
+
+        connections = int(self.options["penguin"]["connections"])
+        base_name = threading.current_thread().name
+        async with aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=connections),
+            headers=dict(session.headers),
+            # Like the other engines, only limit connecting and stalled reads,
+            # big byte ranges can take longer than that to download
+            timeout=aiohttp.ClientTimeout(total=None, connect=15, sock_read=15),
+        ) as client:
+            await asyncio.gather(
+                *[
+                    self._async_segment_worker(client, f"{base_name}/async-{i}")
+                    for i in range(connections)
+                ]
+            )
+
+    async def _async_segment_worker(self, client, worker_name: str) -> None:
+        loop = asyncio.get_running_loop()
+        chunk_size = int(self.options["penguin"]["chunk_size"])
 
-                    if signals:
-                        # Since there can be multiple signals,
-                        # for example: one global and one
-                        #  take the first signal
-                        signal = signals[0]
-                        # if signal is stop, return
-                        if signal == "stop":
-                            self.stopped = True
-                            return
-                        # if signal is pause, halt execution
-                        # until signal is cleared
-                        if signal == "pause":
-                            self._execute_hooks("thread_paused", {"thread": thread_name})
-
-                            while True:
-                                signals = self.check_signal()
-                                if not signals:
-                                    break
-                                elif signals[0] == "stop":
-                                    self.stopped = True
-                                    return
-                                sleep(0.2)
+        thread_vprint(
+            message=lang["penguin"]["thread_started"] % worker_name,
+            module_name="penguin",
+            level="debug",
+            extra_loggers=[self.logger],
+            lock=self.thread_lock,
+        )
+
+        while not self.stopped:
+            pool = self.get_pool(worker_name)
+            if pool is None:
+                return
 
+            thread_vprint(
+                lang["penguin"]["current_pool"] % pool._id,
+                level="verbose",
+                module_name=worker_name,
+                extra_loggers=[self.logger],
+                lock=self.thread_lock,
+            )
+            while not self.stopped:
+                segment = self.scheduler.next_segment(pool)
+                if segment is None:
+                    break
+                if self._skip_segment(segment, worker_name):
+                    continue
+
+                for i in range(self.options["penguin"]["attempts"]):
+                    await asyncio.sleep(rate_limiter.request_delay(segment.url, "cdn"))
+                    request_start = time()
+                    try:
+                        async with client.get(
+                            segment.url, headers=self._segment_headers(segment)
+                        ) as response:
+                            response.raise_for_status()
+                            latency = time() - request_start
+                            await asyncio.sleep(
+                                rate_limiter.response_delay(
+                                    segment.url, response.headers, "cdn"
+                                )
+                            )
+                            size = await self._async_write_segment(
+                                segment, response.content.iter_chunked(chunk_size)
+                            )
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+                        thread_vprint(
+                            lang["penguin"]["except"]["download_fail"]
+                            % (segment._id, ex),
+                            module_name=worker_name,
+                            level="exception",
+                            extra_loggers=[self.logger],
+                            lock=self.thread_lock,
+                        )
+                        await asyncio.sleep(0.5)
+                        continue
+                    if segment.byte_range is not None:
+                        range_stats.record(size, latency, time() - request_start)
+                    self._notify_segment(segment, size, worker_name)
                     break
 
+                if self.check_signal() and await loop.run_in_executor(
+                    None, self._process_signals, worker_name
+                ):
+                    return
+
+    @contextmanager
+    def _open_segment(
+        self, segment: Segment, chunk_size: int
+    ) -> Iterator[Iterator[bytes]]:
+        """
+        Requests a segment, using the HTTP/2 client if available
+
+        :return: Context manager returning an iterator of the segment's data
+        """
+        if self.http2_client is not None:
+            sleep(rate_limiter.request_delay(segment.url, "cdn"))
+            with self.http2_client.stream(
+                "GET", segment.url, headers=self._segment_headers(segment)
+            ) as response:
+                response.raise_for_status()
+                sleep(rate_limiter.response_delay(segment.url, response.headers, "cdn"))
+                yield response.iter_bytes(chunk_size)
+            return
+        with request_webpage(
+            segment.url,
+            method="get",
+            rate_limit="cdn",
+            timeout=15,
+            headers=self._segment_headers(segment),
+            stream=True,
+        ) as response:
+            response.raise_for_status()
+            yield response.iter_content(chunk_size)
+
+    def _skip_segment(self, segment: Segment, worker_name: str) -> bool:
+        """Returns True if the segment has already been downloaded"""
+        if segment._id in self.download_data["downloaded_segments"]:
+            # segment has already been downloaded, skip
+            thread_vprint(
+                message=lang["penguin"]["segment_skip"] % segment._id,
+                module_name=worker_name,
+                level="verbose",
+                extra_loggers=[self.logger],
+                lock=self.thread_lock,
+            )
+            return True
+        thread_vprint(
+            message=lang["penguin"]["segment_start"] % segment._id,
+            module_name=worker_name,
+            level="verbose",
+            extra_loggers=[self.logger],
+            lock=self.thread_lock,
+        )
+        return False
+
+    @staticmethod
+    def _segment_headers(segment: Segment) -> dict:
+        """Returns the request headers needed to download a segment"""
+        if segment.byte_range is None:
+            return {}
+        return {"range": f"bytes={segment.byte_range}"}
+
+    def _segment_chunks(
+        self, segment: Segment, chunks: Iterable[bytes]
+    ) -> Iterator[bytes]:
+        """Applies the enabled tweaks to a segment's data, chunk by chunk"""
+        # TODO: better ttml2 implementation, since previous
+        # one can lose formatting
+        fixer = self._get_vtt_fixer(segment)
+        for chunk in chunks:
+            # Wait if the bandwidth budget has been spent
+            delay = download_budget.reserve(len(chunk))
+            if delay:
+                sleep(delay)
+            yield chunk if fixer is None else fixer.feed(chunk)
+        if fixer is not None:
+            yield fixer.flush()
+
+    def _can_direct_write(self, pool: SegmentPool) -> bool:
+        """
+        Returns True if the pool's segments can be written directly to the
+        output file at their byte range's offset
+        """
+        if not (self.options["penguin"]["direct_write"] and hasattr(os, "pwrite")):
+            return False
+        # Fixed subtitles don't keep the length of the byte ranges
+        return not pool.segments or self._get_vtt_fixer(pool.segments[0]) is None
+
+    def _open_output_files(self) -> None:
+        """
+        Opens and preallocates the output files of the pools with an output
+        size, segments of those pools are written directly to them
+        """
+        for pool in self.download_data["segment_pools"]:
+            if pool.output_size is None:
+                continue
+            path = f"{self.temp_path}/{pool._id}{pool.get_ext_from_segment()}"
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+            preallocate(fd, pool.output_size)
+            self.output_files[pool._id] = fd
+
+    def _close_output_files(self) -> None:
+        for fd in self.output_files.values():
+            # Make sure the data is on disk before saving the segments as
+            # downloaded in the journal
+            os.fsync(fd)
+            os.close(fd)
+        self.output_files = {}
+
+    @staticmethod
+    def _segment_offset(segment: Segment) -> int:
+        """Returns the position of a segment's data in the output file"""
+        return int(segment.byte_range.split("-")[0])
+
+    def _write_segment(self, segment: Segment, chunks: Iterable[bytes]) -> int:
+        """
+        Writes a segment's data, to the pool's output file if it has one
+        or to the segment's file otherwise
+
+        :return: number of bytes written
+        """
+        fd = self.output_files.get(segment._pool)
+        if fd is None:
+            return write_chunks(f"{self.temp_path}/{segment._filename}", chunks)
+        offset = start = self._segment_offset(segment)
+        for chunk in chunks:
+            offset += write_at(fd, chunk, offset)
+        return offset - start
+
+    async def _async_write_segment(
+        self, segment: Segment, chunks: AsyncIterator[bytes]
+    ) -> int:
+        """
+        Same as `_write_segment`, but for asynchronous chunk iterators
+
+        :return: number of bytes written
+        """
+        fd = self.output_files.get(segment._pool)
+        if fd is not None:
+            offset = start = self._segment_offset(segment)
+            async for chunk in chunks:
+                await self._async_throttle(len(chunk))
+                offset += write_at(fd, chunk, offset)
+            return offset - start
+        path = f"{self.temp_path}/{segment._filename}"
+        fixer = self._get_vtt_fixer(segment)
+        written = 0
+        try:
+            with open(f"{path}.part", "wb") as fp:
+                async for chunk in chunks:
+                    await self._async_throttle(len(chunk))
+                    if fixer is not None:
+                        chunk = fixer.feed(chunk)
+                    fp.write(chunk)
+                    written += len(chunk)
+                if fixer is not None:
+                    written += fp.write(fixer.flush())
+            os.replace(f"{path}.part", path)
+        except OSError as ex:
+            exit_if_no_space(ex)
+            raise
+        return written
+
+    @staticmethod
+    async def _async_throttle(size: int) -> None:
+        """Waits if the bandwidth budget has been spent"""
+        delay = download_budget.reserve(size)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def _get_vtt_fixer(self, segment: Segment):
+        if (
+            segment._ext == ".vtt"
+            and self.options["penguin"]["tweaks"]["atresplayer_subtitle_fix"]
+        ):
+            return _VTTFixer()
+
+    def _notify_segment(self, segment: Segment, size: int, worker_name: str) -> None:
+        """Marks the segment as finished and notifies the hooks"""
+        thread_vprint(
+            lang["penguin"]["segment_downloaded"] % segment._id,
+            level="verbose",
+            module_name=worker_name,
+            extra_loggers=[self.logger],
+            lock=self.thread_lock,
+        )
+        segment._finished = True
+
+        self._execute_hooks(
+            "download_progress",
+            {
+                "signal": "downloaded_segment",
+                "content": self.content["extended"],
+                "segment": segment._id,
+                "size": size,
+            },
+        )
+        with self.segment_condition:
+            self.segment_condition.notify_all()
+
+    def _process_signals(self, worker_name: str) -> bool:
+        """
+        Handles the signals sent to this downloader, blocks while paused
+
+        :return: True if the worker must stop
+        """
+        signals = self.check_signal()
+
+        if signals:
+            # Since there can be multiple signals,
+            # for example: one global and one
+            #  take the first signal
+            signal = signals[0]
+            # if signal is stop, return
+            if signal == "stop":
+                self.stopped = True
+                return True
+            # if signal is pause, halt execution
+            # until signal is cleared
+            if signal == "pause":
+                self._execute_hooks("thread_paused", {"thread": worker_name})
+
+                # Wait until the signal is cleared or changed to stop, signals
+                # changed directly in _SIGNAL don't notify, so check them
+                # every second too
+                with self._signal_changed:
+                    while self.check_signal()[:1] not in ([], ["stop"]):
+                        self._signal_changed.wait(timeout=1)
+                    signals = self.check_signal()
+                if signals:
+                    self.stopped = True
+                    return True
+        return False
+
     @staticmethod
     def fix_vtt(data: bytes) -> bytes:
         """
@@ -839,37 +1479,91 @@ class PenguinDownloader(BaseDownloader):
         """Check if a signal has been sent to this PenguinDownloader instance"""
         return [self._SIGNAL[x] for x in ("all", self._thread_id) if x in self._SIGNAL]
 
-    def set_signal(self, signal: str) -> None:
+    def set_signal(self, signal: str, all_downloaders=False) -> None:
         """
         Sets a signal for the current downloader
 
         :param signal: Signal to set
+        :param all_downloaders: Set the signal for every downloader instead
         """
-        self._SIGNAL[self._thread_id] = signal
+        with self._signal_changed:
+            self._SIGNAL["all" if all_downloaders else self._thread_id] = signal
+            self._signal_changed.notify_all()
+
+    def clear_signal(self, all_downloaders=False) -> None:
+        """
+        Clears the signal of the current downloader, resuming it if paused
+
+        :param all_downloaders: Clear the signal set for every downloader
+        """
+        with self._signal_changed:
+            self._SIGNAL.pop("all" if all_downloaders else self._thread_id, None)
+            self._signal_changed.notify_all()
 
     def _download_progress_hook(self, content: dict) -> None:
         """Updates the progress bar and estimated final size"""
         if content["signal"] != "downloaded_segment":
             return
-        self.download_data["downloaded_bytes"] += content["size"]
-        self.download_data["downloaded_segments"].append(content["segment"])
-        # Update the total byte estimate
-        size = self.calculate_final_size(
-            self.download_data["downloaded_bytes"],
-            len(self.download_data["downloaded_segments"]),
-            self.download_data["total_segments"],
-        )
-        self.download_data["total_bytes"] = size
-        # Notify hooks of updated download size
-        self._execute_hooks(
-            "download_progress",
-            {
-                "signal": "updated_size",
-                "downloaded": self.download_data["downloaded_bytes"],
-                "size": size,
-            },
-        )
-        self.save_download_data()
-        # Update progress bar
-        self.progress_bar.total = size
-        self.progress_bar.update(content["size"])
+        # Segment workers run this hook concurrently
+        with self.data_lock:
+            self.download_data["downloaded_bytes"] += content["size"]
+            self.download_data["downloaded_segments"].add(content["segment"])
+            # Update the total byte estimate
+            size = self.calculate_final_size(
+                self.download_data["downloaded_bytes"],
+                len(self.download_data["downloaded_segments"]),
+                self.download_data["total_segments"],
+            )
+            self.download_data["total_bytes"] = size
+            # Notify hooks of updated download size
+            self._execute_hooks(
+                "download_progress",
+                {
+                    "signal": "updated_size",
+                    "downloaded": self.download_data["downloaded_bytes"],
+                    "size": size,
+                },
+            )
+            self.journal.append(content["segment"], content["size"])
+            # Update progress bar
+            self.progress_bar.total = size
+            self.progress_bar.update(content["size"])
+
+
+def parse_ffmpeg_progress(lines: Iterable[str]) -> Iterator[dict]:
+    """
+    Parses the output of ffmpeg's `-progress` option as it's written
+
+    ffmpeg writes a block of key=value lines every update, ending with a
+    `progress` line, which is "continue" or "end" if it's the last update
+
+    :param lines: Lines of the progress output, like ffmpeg's stdout
+    :return: An iterator of dicts with the total_size and progress keys
+    """
+    stats = {"total_size": "0"}
+    for line in lines:
+        key, _, value = line.strip().partition("=")
+        if key == "total_size" and value.isdigit():
+            stats["total_size"] = value
+        elif key == "progress":
+            yield {**stats, "progress": value}
+
+
+class _VTTFixer:
+    """
+    Applies `PenguinDownloader.fix_vtt` to a subtitle file received in chunks,
+    only complete lines are processed, the rest is kept until the next chunk
+    """
+
+    def __init__(self) -> None:
+        self.pending = b""
+
+    def feed(self, chunk: bytes) -> bytes:
+        self.pending += chunk
+        cut = self.pending.rfind(b"\n") + 1
+        data, self.pending = self.pending[:cut], self.pending[cut:]
+        return PenguinDownloader.fix_vtt(data)
+
+    def flush(self) -> bytes:
+        data, self.pending = self.pending, b""
+        return PenguinDownloader.fix_vtt(data)
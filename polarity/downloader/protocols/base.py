@@ -2,8 +2,10 @@ from polarity.types.stream import Stream
 
 
 class StreamProtocol:
-    def __init__(self, stream: Stream, options=dict):
+    def __init__(self, stream: Stream, options=dict, workers: int = None):
         self.stream = stream
         self.url = stream.url
         self.segment_pools = []
         self.options = options
+        # Segment workers the download is allocated, None if unknown
+        self.workers = workers
@@ -1,4 +1,5 @@
-from typing import List
+import threading
+from typing import Iterator, List
 
 from polarity.downloader.protocols import StreamProtocol
 from polarity.types.stream import Segment, SegmentPool
@@ -22,7 +23,13 @@ class FileProtocol(StreamProtocol):
 
     SUPPORTED_EXTENSIONS = r".+"
 
-    def calculate_ranges(self, content_size: int) -> List[str]:
+    # Smallest byte range size picked from the observed throughput
+    MIN_RANGE_SIZE = 262144
+    # Minimum ratio between the time spent transferring a byte range and
+    # the time spent waiting for the response
+    LATENCY_RATIO = 9
+
+    def calculate_ranges(self, content_size: int) -> Iterator[str]:
         """
         Calculate byte ranges for segments
 
@@ -30,40 +37,97 @@ class FileProtocol(StreamProtocol):
         :yield: byte ranges
         """
         content_size = int(content_size)  # file size in bytes
-        current = -1  # the initial range size
-        end = False  # stops range generation if True
-        while True:
-            # split the file in 1 MiB segments
-            final = current + (1024**2)
-            if final > content_size:
-                # avoid requesting invalid bytes
-                final = content_size
-                end = True
-            yield f"{current + 1}-{final}"
-            if end:
+        start = 0
+        for size in self.range_sizes(content_size):
+            if start >= content_size:
                 return
-            current += 1024**2
+            # avoid requesting invalid bytes
+            end = min(start + size, content_size) - 1
+            yield f"{start}-{end}"
+            start = end + 1
+
+    def range_sizes(self, content_size: int) -> Iterator[int]:
+        """
+        Starting with the configured range size, doubles or halves the size
+        of the ranges until reaching the target size
+
+        :param content_size: File size in bytes
+        :yield: byte range sizes
+        """
+        size = int(self.options["penguin"]["range_size"])
+        target = self.target_range_size(content_size)
+        while True:
+            yield size
+            if size < target:
+                size = min(size * 2, target)
+            elif size > target:
+                size = max(size // 2, target)
+
+    def target_range_size(self, content_size: int) -> int:
+        """
+        Picks a range size big enough for the request latency to be a small
+        part of the download time, from the throughput and latency of
+        previous range requests
+
+        The size is limited so all the workers get a range to download,
+        and the ranges being downloaded don't exceed `max_inflight_bytes`,
+        using the workers allocated to the download if known, else the
+        configured threads or connections
+
+        Without previous range requests (the first file downloaded by the
+        process) the limit itself is the target, so the ranges grow from
+        `range_size` up to it. The target isn't updated while the file is
+        downloading, only the next files use the observed throughput
+        """
+        penguin = self.options["penguin"]
+        workers = self.workers or int(
+            penguin["connections"]
+            if penguin["engine"] == "asyncio"
+            else penguin["threads"]
+        )
+        limit = min(
+            int(penguin["max_range_size"]),
+            int(penguin["max_inflight_bytes"]) // workers,
+            max(content_size // workers, self.MIN_RANGE_SIZE),
+        )
+        throughput, latency = range_stats.throughput, range_stats.latency
+        if throughput is None:
+            return limit
+        return int(
+            max(
+                min(throughput * latency * self.LATENCY_RATIO, limit), self.MIN_RANGE_SIZE
+            )
+        )
+
+    @staticmethod
+    def range_size(byte_range: str) -> int:
+        start, end = byte_range.split("-")
+        return int(end) - int(start) + 1
 
     def process(self) -> List[SegmentPool]:
         """
         Processes the stream
         """
         segments = []
+        output_size = None
         # make a request to check if we can split the file
         # into segments
-        request = request_webpage(self.url, "head")
+        request = request_webpage(self.url, "head", rate_limit="cdn")
         # Check if web server accepts byte ranges
         if (
             "Accept-Ranges" in request.headers
             # Make sure we also have a content length header
             and "Content-Length" in request.headers
             and request.headers["Accept-Ranges"] == "bytes"
+            # Empty files have no byte ranges to request
+            and int(request.headers["Content-Length"]) > 0
         ):
             for n, range in enumerate(
                 self.calculate_ranges(request.headers["Content-Length"])
             ):
                 segment = Segment(self.url, number=n, byte_range=range)
                 segments.append(segment)
+            output_size = int(request.headers["Content-Length"])
 
         else:
             # Web server does not accept byte ranges, download the whole
@@ -72,4 +136,49 @@ class FileProtocol(StreamProtocol):
             # subtitles or small audio tracks
             segments = [Segment(self.url, 0)]
 
-        return [SegmentPool(segments=segments, media_type="unified", pool_type="file")]
+        return [
+            SegmentPool(
+                segments=segments,
+                media_type="unified",
+                pool_type="file",
+                output_size=output_size,
+            )
+        ]
+
+
+class RangeStats:
+    """
+    Moving averages of the throughput and latency of byte range requests,
+    shared by every download, used to size the ranges of the next files
+    """
+
+    # Weight of new samples in the averages
+    SMOOTHING = 0.2
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.throughput = None
+        self.latency = None
+
+    def record(self, size: int, latency: float, elapsed: float) -> None:
+        """
+        Add a finished range request to the averages
+
+        :param size: Bytes downloaded
+        :param latency: Seconds until the response headers were received
+        :param elapsed: Seconds the whole request took
+        """
+        transfer_time = elapsed - latency
+        if size <= 0 or transfer_time <= 0:
+            return
+        with self._lock:
+            self.throughput = self._average(self.throughput, size / transfer_time)
+            self.latency = self._average(self.latency, latency)
+
+    def _average(self, current: float, sample: float) -> float:
+        if current is None:
+            return sample
+        return current + self.SMOOTHING * (sample - current)
+
+
+range_stats = RangeStats()
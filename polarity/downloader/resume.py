@@ -0,0 +1,145 @@
+import os
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+
+class SegmentSet:
+    """
+    Set of downloaded segment identifiers, used for download resuming
+
+    Membership checks are O(1), and it's serialized grouping the segment
+    numbers of every pool into ranges, so a pool with 5000 downloaded segments
+    is stored as `{"video0": [[0, 4999]]}` instead of 5000 identifiers
+
+    >>> segments = SegmentSet(["video0_0", "video0_1", "audio0_5"])
+    >>> "video0_1" in segments
+    True
+    >>> segments.serialize()
+    {'audio0': [[5, 5]], 'video0': [[0, 1]]}
+    """
+
+    def __init__(self, segments: Iterable[str] = None) -> None:
+        self._segments = set(segments) if segments is not None else set()
+
+    def __contains__(self, segment_id: str) -> bool:
+        return segment_id in self._segments
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._segments)
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def __repr__(self) -> str:
+        return f"SegmentSet({len(self)} segments)"
+
+    def add(self, segment_id: str) -> None:
+        self._segments.add(segment_id)
+
+    def serialize(self) -> Dict[str, List[List[int]]]:
+        """
+        :return: A dict with pool identifiers as keys and a list of
+        inclusive segment number ranges as values
+        """
+        numbers = {}
+        for segment_id in self._segments:
+            pool_id, number = segment_id.rsplit("_", 1)
+            numbers.setdefault(pool_id, []).append(int(number))
+        return {pool_id: self.to_ranges(numbers[pool_id]) for pool_id in sorted(numbers)}
+
+    @classmethod
+    def deserialize(cls, data: Union[Dict[str, List[List[int]]], List[str]]):
+        """
+        Create a SegmentSet from it's serialized form
+
+        :param data: Serialized data, or a list of segment identifiers
+        (format used by data.json files of older versions)
+        """
+        if isinstance(data, list):
+            return cls(data)
+        return cls(
+            f"{pool_id}_{number}"
+            for pool_id, ranges in data.items()
+            for start, end in ranges
+            for number in range(start, end + 1)
+        )
+
+    @staticmethod
+    def to_ranges(numbers: Iterable[int]) -> List[List[int]]:
+        """
+        Group numbers into inclusive ranges
+
+        >>> SegmentSet.to_ranges([-1, 0, 1, 2, 7, 8, 10])
+        [[-1, 2], [7, 8], [10, 10]]
+        """
+        ranges = []
+        for number in sorted(numbers):
+            if ranges and number == ranges[-1][1] + 1:
+                ranges[-1][1] = number
+            else:
+                ranges.append([number, number])
+        return ranges
+
+
+class ResumeJournal:
+    """
+    Append-only log of downloaded segments, saving a segment costs a single
+    line write instead of rewriting the whole download data file
+
+    Every line contains a segment identifier and it's size in bytes. Lines are
+    flushed as soon as they're written, so they survive the process being
+    killed, and synced to disk every `sync_every` lines
+
+    >>> journal = ResumeJournal("/tmp/download/segments.journal")
+    >>> journal.append("video0_0", 1048576)
+    >>> list(journal.read())
+    [('video0_0', 1048576)]
+    """
+
+    def __init__(self, path: str, sync_every: int = 32) -> None:
+        self.path = path
+        self.sync_every = sync_every
+        self._file = None
+        self._unsynced = 0
+
+    def append(self, segment_id: str, size: int) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a")
+        self._file.write(f"{segment_id} {size}\n")
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self) -> None:
+        """Forces the written lines to disk"""
+        if self._file is None or not self._unsynced:
+            return
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def read(self) -> Iterator[Tuple[str, int]]:
+        """
+        :return: An iterator of (segment identifier, size) tuples
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r") as f:
+            for line in f:
+                # The last line can be incomplete if the process was killed
+                # while writing it, that segment will be downloaded again
+                if not line.endswith("\n"):
+                    break
+                segment_id, size = line.split()
+                yield segment_id, int(size)
+
+    def truncate(self) -> None:
+        """Empties the journal, once it's entries have been saved elsewhere"""
+        self.close()
+        open(self.path, "w").close()
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        self.sync()
+        self._file.close()
+        self._file = None
@@ -0,0 +1,200 @@
+import threading
+from collections import deque
+from typing import Dict, Hashable, List
+
+from polarity.types.stream import Segment, SegmentPool
+from polarity.utils import TokenBucket
+
+
+class SegmentScheduler:
+    """
+    Distributes the segments of a download between segment workers
+
+    Each pool keeps it's pending segments in a deque, workers reserve a pool
+    and pop segments from it. Once every pool has been reserved, idle workers
+    assist the pool with the most pending segments. Since segments are popped
+    from a shared deque no segment is handed out twice, even if multiple
+    workers are downloading from the same pool
+
+    >>> scheduler = SegmentScheduler(pools)
+    >>> pool = scheduler.get_pool("download-0/0")
+    >>> segment = scheduler.next_segment(pool)
+    """
+
+    def __init__(self, pools: List[SegmentPool]) -> None:
+        self._lock = threading.Lock()
+        self._pools = self.interleave(pools)
+        self._pending: Dict[str, deque] = {p._id: deque(p.segments) for p in self._pools}
+        self._unreserved = deque(self._pools)
+
+    @staticmethod
+    def interleave(pools: List[SegmentPool]) -> List[SegmentPool]:
+        """
+        Orders pools alternating their media types, so video, audio and
+        subtitle pools get reserved evenly
+
+        :param pools: List of segment pools
+        :return: The interleaved list of pools
+        """
+        groups = {}
+        for pool in pools:
+            groups.setdefault(pool.media_type, deque()).append(pool)
+        interleaved = []
+        while groups:
+            for media_type in list(groups):
+                interleaved.append(groups[media_type].popleft())
+                if not groups[media_type]:
+                    del groups[media_type]
+        return interleaved
+
+    def get_pool(self, worker_name: str) -> SegmentPool:
+        """
+        Reserves a pool for a worker, if every pool is reserved, returns the
+        pool with the most pending segments
+
+        :param worker_name: Name of the worker requesting the pool
+        :return: A SegmentPool, None if there are no pending segments left
+        """
+        with self._lock:
+            while self._unreserved:
+                pool = self._unreserved.popleft()
+                if not self._pending[pool._id]:
+                    pool._finished = True
+                    continue
+                pool._reserved = True
+                pool._reserved_by = worker_name
+                return pool
+            active = [p for p in self._pools if self._pending[p._id]]
+            if not active:
+                return
+            return max(active, key=lambda p: len(self._pending[p._id]))
+
+    def next_segment(self, pool: SegmentPool) -> Segment:
+        """
+        Takes the next pending segment of a pool
+
+        :param pool: Pool to take the segment from
+        :return: A Segment, None if the pool has no pending segments left
+        """
+        try:
+            return self._pending[pool._id].popleft()
+        except IndexError:
+            pool._finished = True
+
+    @property
+    def pending(self) -> int:
+        """Number of segments not yet handed out to a worker"""
+        return sum(len(p) for p in self._pending.values())
+
+
+class DownloadBudget:
+    """
+    Process-wide budget of segment workers and bandwidth, shared by every
+    active download
+
+    Every download gets at least one worker, the remaining workers are split
+    between downloads proportionally to their remaining bytes, so as
+    downloads finish their workers go to the ones with the most work left
+
+    >>> budget = DownloadBudget(workers=15, bandwidth=0)
+    >>> budget.register(downloader, remaining=2 ** 30)
+    >>> budget.allocation(downloader)
+    15
+    """
+
+    def __init__(self, workers: int = 15, bandwidth: int = 0) -> None:
+        self._lock = threading.Lock()
+        # Notified when the allocations may have changed
+        self._changed = threading.Condition(self._lock)
+        self._downloads: Dict[Hashable, dict] = {}
+        self.version = 0
+        self.workers = None
+        self.bandwidth: TokenBucket = None
+        self.set_limits(workers, bandwidth)
+
+    def set_limits(self, workers: int, bandwidth: int) -> None:
+        """
+        :param workers: Maximum segment workers between all downloads
+        :param bandwidth: Maximum bytes per second between all downloads,
+        0 to disable
+        """
+        workers, bandwidth = max(int(workers), 1), max(int(bandwidth), 0)
+        with self._lock:
+            if self.bandwidth is None or self.bandwidth.rate != bandwidth:
+                # Only replaced if the limit changes, a new bucket would
+                # forget the bandwidth spent by the running downloads
+                self.bandwidth = TokenBucket(bandwidth)
+            if self.workers != workers:
+                self.workers = workers
+                self._notify()
+
+    def register(self, download: Hashable, remaining: int = None, priority=1.0) -> None:
+        """
+        Add a download to the budget
+
+        :param download: Identifier of the download
+        :param remaining: Bytes left to download, None if unknown
+        :param priority: Multiplier of the download's share
+        """
+        with self._lock:
+            self._downloads[download] = {"remaining": remaining, "priority": priority}
+            self._notify()
+
+    def update(self, download: Hashable, remaining: int) -> None:
+        with self._lock:
+            if download in self._downloads:
+                self._downloads[download]["remaining"] = remaining
+
+    def unregister(self, download: Hashable) -> None:
+        with self._lock:
+            self._downloads.pop(download, None)
+            self._notify()
+
+    def allocation(self, download: Hashable) -> int:
+        """
+        :return: Number of workers the download can use
+        """
+        with self._lock:
+            if download not in self._downloads:
+                return 0
+            known = [d["remaining"] for d in self._downloads.values() if d["remaining"]]
+            # Downloads with an unknown size are weighted as an average one
+            default = sum(known) / len(known) if known else 1
+            weights = {
+                k: (d["remaining"] or default) * d["priority"]
+                for k, d in self._downloads.items()
+            }
+            spare = max(self.workers - len(weights), 0)
+            total = sum(weights.values()) or 1
+            return 1 + int(spare * weights[download] / total)
+
+    def notify(self) -> None:
+        """Wakes up the threads waiting for a change, like a worker exiting"""
+        with self._lock:
+            self._notify()
+
+    def _notify(self) -> None:
+        self.version += 1
+        self._changed.notify_all()
+
+    def wait(self, version: int) -> None:
+        """
+        Blocks until there's a change after the given version
+
+        :param version: Value of `version` when the caller last checked
+        the state
+        """
+        with self._lock:
+            self._changed.wait_for(lambda: self.version != version)
+
+    def reserve(self, size: int) -> float:
+        """
+        Take bandwidth from the budget
+
+        :param size: Bytes about to be downloaded
+        :return: Seconds to wait before downloading them
+        """
+        return self.bandwidth.reserve(size)
+
+
+download_budget = DownloadBudget()
@@ -1,5 +1,6 @@
 import re
-from typing import Union, List, Dict
+from itertools import chain
+from typing import Union, List, Dict, Iterator
 from urllib.parse import urlparse
 
 from polarity.config.arguments import parser
@@ -118,9 +119,9 @@ class AtresplayerExtractor(ContentExtractor):
             else:
                 episode_id = parsed_content_id.id
             # Get season page from jsonld API
-            json = request_json(self.API_URL + "client/v1/jsonld/episode/" + episode_id)[
-                0
-            ]
+            json = request_json(
+                self.API_URL + "client/v1/jsonld/episode/" + episode_id, cache="episode"
+            )[0]
             season_page = request_webpage(json["partOfSeason"]["@id"]).content.decode()
             # Get the series identifier
             series_id = re.search(
@@ -167,7 +168,7 @@ class AtresplayerExtractor(ContentExtractor):
     ) -> Union[Series, dict]:
 
         self._series_json = request_json(
-            f"{self.API_URL}client/v1/page/format/{series_id}"
+            f"{self.API_URL}client/v1/page/format/{series_id}", cache="series"
         )[0]
 
         if return_raw_info:
@@ -176,6 +177,7 @@ class AtresplayerExtractor(ContentExtractor):
         _episodes = request_json(
             f"{self.API_URL}client/v1/row/search",
             params={"entityType": "ATPEpisode", "formatId": series_id, "size": 1},
+            cache="episodes",
         )
 
         vprint(
@@ -255,6 +257,7 @@ class AtresplayerExtractor(ContentExtractor):
         season_jsonld = request_json(
             url=f"{self.API_URL}client/v1/jsonld/format/{self._series_json['id']}",
             params={"seasonId": season_id},
+            cache="season",
         )
         return {
             "number": season_jsonld[0]["seasonNumber"],
@@ -269,6 +272,7 @@ class AtresplayerExtractor(ContentExtractor):
         season_json = request_json(
             f"{self.API_URL}client/v1/page/format/{self._series_json['id']}",
             params={"seasonId": season_id},
+            cache="season",
         )[0]
 
         if return_raw_info:
@@ -302,12 +306,10 @@ class AtresplayerExtractor(ContentExtractor):
         self, series_id: str, season_id: str, get_partial_episodes=False
     ) -> List[Episode]:
 
-        page = 0
-        # Placeholder until the total number of pages is known
-        total_pages = 727
-        while page < total_pages:
-            page_json = request_json(
+        def get_page(page: int) -> dict:
+            return request_json(
                 url=f"{self.API_URL}client/v1/row/search",
+                cache="episodes",
                 params={
                     "entityType": "ATPEpisode",
                     "formatId": series_id,
@@ -317,6 +319,9 @@ class AtresplayerExtractor(ContentExtractor):
                 },
             )[0]
 
+        def get_wanted_episodes() -> Iterator[Episode]:
+            # The first page tells the number of total pages
+            page_json = get_page(0)
             if "pageInfo" not in page_json:
                 # If pageInfo is not in the json file, the season has no
                 # content, therefore skip it
@@ -326,19 +331,28 @@ class AtresplayerExtractor(ContentExtractor):
                     "warning",
                     "atresplayer",
                 )
-                break
-
-            # Update the number of total pages
-            total_pages = page_json["pageInfo"]["totalPages"]
-            for episode in page_json["itemRows"]:
-                e = Episode(title=episode["title"], id=episode["contentId"])
-                passes = self.check_content(e)
-                if passes and not get_partial_episodes:
-                    yield self.get_episode_info(episode_id=episode["contentId"])
-                elif passes and get_partial_episodes:
-                    yield e
-
-            page += 1
+                return
+            # Then the rest of pages are requested concurrently
+            pages = chain(
+                [page_json],
+                self._fetch_concurrently(
+                    get_page, range(1, page_json["pageInfo"]["totalPages"])
+                ),
+            )
+            for page_json in pages:
+                for episode in page_json.get("itemRows", []):
+                    e = Episode(title=episode["title"], id=episode["contentId"])
+                    if self.check_content(e):
+                        yield e
+
+        if get_partial_episodes:
+            yield from get_wanted_episodes()
+            return
+        # Episode information and streams are requested concurrently too,
+        # while the pages are still being fetched
+        yield from self._fetch_concurrently(
+            lambda e: self.get_episode_info(episode_id=e.id), get_wanted_episodes()
+        )
 
     def get_episode_info(
         self, episode_id: str = None, return_raw_info=False
@@ -346,7 +360,7 @@ class AtresplayerExtractor(ContentExtractor):
 
         # Download episode info json
         episode_info = request_json(
-            url=f"{self.API_URL}client/v1/page/episode/{episode_id}"
+            url=f"{self.API_URL}client/v1/page/episode/{episode_id}", cache="episode"
         )[0]
 
         if return_raw_info:
@@ -371,8 +385,9 @@ class AtresplayerExtractor(ContentExtractor):
                     resolution=(1920, 1080),
                 )
             ],
-            streams=self._get_streams(episode_id),
         )
+        if not self.is_downloaded(episode):
+            self.set_streams(episode, lambda: self._get_streams(episode_id))
 
         # Check if the episode needs to be downloaded
         self.check_content(episode)
@@ -539,29 +554,38 @@ class AtresplayerExtractor(ContentExtractor):
             if series._atresplayer_mono:
                 # series only has one episode, with no seasons
                 episode_id = re.search(r"/(\w+)$", self._series_json["episode"]).group(1)
-                episode = self.get_episode_info(episode_id)
-                # link the episode
                 # better to treat it as a pseudo-movie
-                series.link_content(episode.as_movie())
-                self.notify_extraction(episode.as_movie())
+                movie = self.get_episode_info(episode_id).as_movie()
+                # link the movie
+                series.link_content(movie)
+                self.notify_extraction(movie)
                 self.progress_bar.update()
             elif not series._atresplayer_mono:
-                for season in self.get_seasons():
-                    _season = self.get_season_info(season.id)
+                # Sync runs skip listing the seasons of series without new
+                # content, and extract only the seasons that can have it
+                listed = [] if self.is_synced(series) else self.get_seasons(series.id)
+                seasons = [s.id for s in self.sync_seasons(series, listed)]
+                # Season information is requested concurrently, seasons are
+                # still notified in order
+                for _season in self._fetch_concurrently(self.get_season_info, seasons):
                     # Link the season
                     series.link_content(_season)
                     self.notify_extraction(_season)
-                    for episode in self.get_episodes_from_season(_season.id):
+                    for episode in self.get_episodes_from_season(
+                        identifiers[Series], _season.id
+                    ):
                         _season.link_content(episode)
                         self.notify_extraction(episode)
                         self.progress_bar.update()
+                if listed:
+                    self.save_sync_state(series, listed)
             self.progress_bar.close()
 
         elif url_type == Season:
             # Gets single season information
             season = self.get_season_info(season_id=identifiers[Season])
             series.link_content(season)
-            self.notify_extraction(episode)
+            self.notify_extraction(season)
             self.progress_bar = ProgressBar(
                 head="extraction",
                 desc=series.title,
@@ -572,7 +596,7 @@ class AtresplayerExtractor(ContentExtractor):
                 identifiers[Series], identifiers[Season]
             ):
                 season.link_content(episode)
-                self.notify_extraction(season)
+                self.notify_extraction(episode)
                 self.progress_bar.update()
             self.progress_bar.close()
 
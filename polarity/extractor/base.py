@@ -1,17 +1,21 @@
 import logging
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from getpass import getpass
 from http.cookiejar import CookieJar, LWPCookieJar
-from time import sleep
-from typing import List, Union
+from typing import Callable, Iterable, Iterator, List, Union
 
 from polarity.config import paths
 from polarity.lang import lang
 from polarity.extractor import flags
 from polarity.types import Episode, Movie, SearchResult, Season, Series, Thread
 from polarity.types.content import Content, ContentContainer
+from polarity.types.download_log import download_log
 from polarity.types.filter import MatchFilter, NumberFilter, TypeFilter
+from polarity.types.stream import Stream
+from polarity.types.sync_state import sync_state
 from polarity.utils import dict_merge, mkfile, vprint
 
 
@@ -95,11 +99,10 @@ class ContentExtractor(BaseExtractor):
 
         Also, executes some extraction-related hooks
         """
-        while self._extractor.is_alive():
-            sleep(0.5)
+        self._extractor.join()
         # remove handler from the logger
         logging.getLogger(f"extractor-{self._thread_id}").handlers = []
-        self.info._extracted = True
+        self.info.set_extracted()
 
     def __execute_hooks(self, hook: str, contents: dict) -> None:
         if hook not in self.hooks:
@@ -142,10 +145,6 @@ class ContentExtractor(BaseExtractor):
             },
         )
         # Return a partial information object
-        while not hasattr(self, "info"):
-            # Check if extractor fucking died
-            sleep(0.1)
-
         self.info._extractor = self.extractor_name
         return self.info
 
@@ -243,6 +242,145 @@ class ContentExtractor(BaseExtractor):
             return False
         return True
 
+    def is_downloaded(self, content: Content) -> bool:
+        """
+        Check if content has already been downloaded, so requesting it's
+        streams can be skipped
+
+        :param content: Content object, with it's identifier set
+        :return: True if content is in the download log and redownloading
+        is disabled
+        """
+        from polarity.config import options
+
+        if (
+            options["action"] not in ("download", "sync")
+            or options["download"]["redownload"]
+        ):
+            return False
+        if not download_log.in_log(content.content_id):
+            return False
+        vprint(
+            lang["extractor"]["skip_streams_downloaded"] % content.content_id,
+            "debug",
+            self.extractor_name.lower(),
+        )
+        return True
+
+    def set_streams(self, content: Content, resolver: Callable[[], List[Stream]]):
+        """
+        Set the streams of content, if `lazy_streams` is enabled they're
+        requested once it's download starts, so their urls and tokens don't
+        expire while waiting in the queue
+
+        :param content: Content object
+        :param resolver: Function returning the content's streams
+        """
+        if self.options.get("lazy_streams", False):
+            content.set_stream_resolver(resolver)
+            return
+        content.streams = resolver()
+
+    ########
+    # Sync #
+    ########
+
+    @staticmethod
+    def _is_syncing() -> bool:
+        from polarity.config import options
+
+        return options["action"] == "sync"
+
+    @staticmethod
+    def _is_season_downloaded(season_state: dict) -> bool:
+        return all(download_log.in_log(c) for c in season_state["content"])
+
+    def is_synced(self, series: Series) -> bool:
+        """
+        On sync runs, check if a series has the same episode count as on the
+        last run and all it's content has been downloaded, so listing it's
+        seasons can be skipped
+
+        :param series: Series object, with it's episode count set
+        :return: True if the series has no new content
+        """
+        if not self._is_syncing():
+            return False
+        state = sync_state.get(series.content_id)
+        if (
+            not state
+            or not series.episode_count
+            or state["episode_count"] != series.episode_count
+            or not all(map(self._is_season_downloaded, state["seasons"].values()))
+        ):
+            return False
+        vprint(
+            lang["extractor"]["sync_no_new_content"] % series.title,
+            module_name=self.extractor_name.lower(),
+        )
+        return True
+
+    def sync_seasons(self, series: Series, seasons: List[Season]) -> List[Season]:
+        """
+        On sync runs, take out the seasons without new content since the
+        last run. Seasons are kept if they're new, the latest ones, or have
+        content that hasn't been downloaded yet
+
+        :param series: Series object
+        :param seasons: Every season of the series, with their numbers set
+        :return: List of seasons to extract
+        """
+        if not self._is_syncing():
+            return seasons
+        known = sync_state.get(series.content_id).get("seasons", {})
+        latest = max(
+            (s["number"] for s in known.values() if s["number"] is not None),
+            default=None,
+        )
+        wanted = [
+            s
+            for s in seasons
+            if s.id not in known
+            or s.number is None
+            or latest is None
+            or s.number >= latest
+            or not self._is_season_downloaded(known[s.id])
+        ]
+        if len(wanted) < len(seasons):
+            vprint(
+                lang["extractor"]["sync_skipped_seasons"]
+                % (len(seasons) - len(wanted), series.title),
+                "debug",
+                self.extractor_name.lower(),
+            )
+        return wanted
+
+    def save_sync_state(self, series: Series, seasons: List[Season]) -> None:
+        """
+        On sync runs, store the seasons of a series and the content queued
+        for download from each one
+
+        :param series: Series object, with the extracted seasons linked
+        :param seasons: Every season of the series, including the ones
+        skipped by `sync_seasons`
+        """
+        if not self._is_syncing():
+            return
+        known = sync_state.get(series.content_id).get("seasons", {})
+        extracted = {s.id: s for s in series.content if isinstance(s, Season)}
+        state = {"episode_count": series.episode_count, "seasons": {}}
+        for season in seasons:
+            if season.id in extracted:
+                content = [
+                    c.content_id
+                    for c in extracted[season.id].get_all_content()
+                    if c.skip_download is None
+                ]
+            else:
+                content = known.get(season.id, {}).get("content", [])
+            state["seasons"][season.id] = {"number": season.number, "content": content}
+        sync_state.update(series.content_id, state)
+
     def _check_season(self, season: Season) -> bool:
         return "ALL" in self._seasons or season.number in self._seasons
 
@@ -356,6 +494,33 @@ class ContentExtractor(BaseExtractor):
             level="warning",
         )
 
+    def _fetch_concurrently(self, function: Callable, items: Iterable) -> Iterator:
+        """
+        Calls a function with every item using up to `fetch_workers` threads
+
+        Results are yielded in the items' order as soon as they're ready, so
+        the first ones can be notified while the rest are being fetched
+
+        :param function: Function taking an item as it's only argument
+        :param items: Items to call the function with
+        :return: An iterator of the function's return values
+        """
+        workers = max(int(self.options.get("fetch_workers", 1)), 1)
+        if workers == 1:
+            yield from map(function, items)
+            return
+        with ThreadPoolExecutor(
+            workers, thread_name_prefix=f"{self.extractor_name}_Fetch"
+        ) as executor:
+            pending = deque()
+            for item in items:
+                pending.append(executor.submit(function, item))
+                # Don't get too far ahead of the consumer
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
 
 class StreamExtractor(BaseExtractor):
     """
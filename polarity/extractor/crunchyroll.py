@@ -397,6 +397,7 @@ class CrunchyrollExtractor(ContentExtractor):
         # get the series information
         series_json = request_json(
             url=self.CMS_API_URL + "/series/" + series_id,
+            cache="series",
             headers={"Authorization": self.account_info["bearer"]},
             params={
                 "locale": self.options["crunchyroll"]["meta_language"],
@@ -449,6 +450,7 @@ class CrunchyrollExtractor(ContentExtractor):
 
         api_season_list = request_json(
             self.CMS_API_URL + "/seasons",
+            cache="season",
             params={
                 "series_id": series_id,
                 "locale": self.options["crunchyroll"]["meta_language"],
@@ -497,6 +499,7 @@ class CrunchyrollExtractor(ContentExtractor):
 
         season_json = request_json(
             f"{self.CMS_API_URL}/seasons/{season_id}",
+            cache="season",
             headers={"Authorization": self.account_info["bearer"]},
             params={
                 "locale": self.options["crunchyroll"]["meta_language"],
@@ -547,6 +550,7 @@ class CrunchyrollExtractor(ContentExtractor):
 
         unparsed_list = request_json(
             f"{self.CMS_API_URL}/episodes",
+            cache="episodes",
             params={
                 "season_id": season_id,
                 "locale": self.options["crunchyroll"]["meta_language"],
@@ -558,6 +562,7 @@ class CrunchyrollExtractor(ContentExtractor):
         if return_raw_info:
             return unparsed_list
 
+        wanted = []
         for episode in unparsed_list["items"]:
             # Create a partial episode object to check if passes filter check
             e = Episode(
@@ -566,14 +571,19 @@ class CrunchyrollExtractor(ContentExtractor):
                 number=episode["episode_number"],
             )
             if self.check_content(e) and not get_partial_episodes:
-                # Yields the episode with all the information,
-                # including streams, default behaviour
-                yield self._parse_episode_info(episode)
+                wanted.append(episode)
+                continue
             elif self.check_content(e) and get_partial_episodes:
                 # Yields the episode with basic information
                 yield e
             if hasattr(self, "progress_bar"):
                 self.progress_bar.update()
+        # Yields the episodes with all the information, including streams,
+        # default behaviour. Streams are requested concurrently
+        for episode in self._fetch_concurrently(self._parse_episode_info, wanted):
+            yield episode
+            if hasattr(self, "progress_bar"):
+                self.progress_bar.update()
 
     def get_episode_info(
         self, episode_id: str, return_raw_info=False, get_streams=True
@@ -592,6 +602,7 @@ class CrunchyrollExtractor(ContentExtractor):
 
         episode_info = request_json(
             self.CMS_API_URL + "/episodes/" + episode_id,
+            cache="episode",
             headers={"Authorization": self.account_info["bearer"]},
             params={
                 "locale": self.options["crunchyroll"]["meta_language"],
@@ -641,8 +652,13 @@ class CrunchyrollExtractor(ContentExtractor):
 
         episode._partial = False
 
-        if get_streams and "playback" in episode_info:
-            episode.streams = self._get_streams(episode_info["playback"], episode.id)
+        if get_streams and self.is_downloaded(episode):
+            # Skipped later by the download task, no need to get streams
+            pass
+        elif get_streams and "playback" in episode_info:
+            self.set_streams(
+                episode, lambda: self._get_streams(episode_info["playback"], episode.id)
+            )
         elif get_streams and "playback" not in episode_info:
             episode.skip_download = lang["extractor"]["skip_dl_premium"]
 
@@ -677,7 +693,16 @@ class CrunchyrollExtractor(ContentExtractor):
                 return streams
             playback = inf["playback"]
 
-        streams_json = request_json(url=playback)[0]
+        # The playback url of cached episode information can have an
+        # expired signature, sign it again with the current tokens
+        streams_json = request_json(
+            url=playback.split("?")[0],
+            params={
+                "Signature": self.account_info["signature"],
+                "Policy": self.account_info["policy"],
+                "Key-Pair-Id": self.account_info["key_pair_id"],
+            },
+        )[0]
         # Case 1: Disabled hardsubs or desired hardsub language does not exist
         if (
             self.options["crunchyroll"]["hardsub_language"] == "none"
@@ -800,7 +825,10 @@ class CrunchyrollExtractor(ContentExtractor):
             # the progress bar will be inaccurate
             self._print_filter_warning()
 
-            for season in self.get_seasons(series_id=series_guid):
+            seasons = []
+            # Sync runs skip listing the seasons of series without new content
+            listed = [] if self.is_synced(series) else self.get_seasons(series_guid)
+            for season in listed:
                 if (
                     "all" not in self.options["crunchyroll"]["dub_language"]
                     and season._crunchyroll_dub
@@ -812,8 +840,13 @@ class CrunchyrollExtractor(ContentExtractor):
                         "crunchyroll",
                     )
                     continue
+                seasons.append(season)
 
-                _season = self.get_season_info(season.id)
+            # Season information is requested concurrently, seasons are
+            # still notified in order
+            for _season in self._fetch_concurrently(
+                self.get_season_info, [s.id for s in self.sync_seasons(series, seasons)]
+            ):
                 self.notify_extraction(_season)
                 # link the season with the series
                 series.link_content(_season)
@@ -829,6 +862,8 @@ class CrunchyrollExtractor(ContentExtractor):
                         # now check the content
                         self.check_content(episode)
                         self.notify_extraction(episode)
+            if seasons:
+                self.save_sync_state(series, seasons)
 
         elif url_type == Episode:
             # Get series and season info
@@ -62,7 +62,9 @@ class PokemonTVExtractor(ContentExtractor, LimelightExtractor):
         self.language = re.search(r"language: \"([\w-]{5})\"", page).group(1)
         vprint(lang["pokemontv"]["get_channel_info"], "debug", "pokemontv")
         # get the channels information
-        self.channels = request_json(f"{self.API_URL}/channels/{self.region}")[0]
+        self.channels = request_json(
+            f"{self.API_URL}/channels/{self.region}", cache="episodes"
+        )[0]
 
     # *-- URL identification methods --* #
 
@@ -207,12 +209,17 @@ class PokemonTVExtractor(ContentExtractor, LimelightExtractor):
             # adding 1 to the list index
             episode.number = channel_info["media"].index(episode_info) + 1
 
-        episode.streams = self.get_streams(episode.id)
-        for stream in episode.streams:
-            if stream.extra_sub:
-                continue
-            stream.name = {AUDIO: self.LANG_CODES[self.language]["name"]}
-            stream.language = {AUDIO: self.LANG_CODES[self.language]["lang"]}
+        def get_streams() -> List[Stream]:
+            streams = self.get_streams(episode.id)
+            for stream in streams:
+                if stream.extra_sub:
+                    continue
+                stream.name = {AUDIO: self.LANG_CODES[self.language]["name"]}
+                stream.language = {AUDIO: self.LANG_CODES[self.language]["lang"]}
+            return streams
+
+        if not self.is_downloaded(episode):
+            self.set_streams(episode, get_streams)
 
         return episode
 
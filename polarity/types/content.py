@@ -1,7 +1,7 @@
+import threading
 from dataclasses import dataclass, field
 from datetime import datetime
-from time import sleep
-from typing import List, Union
+from typing import Callable, List, Union
 
 from polarity.lang import lang
 
@@ -10,6 +10,9 @@ from polarity.types.people import Person
 from polarity.types.stream import Stream
 from polarity.utils import normalize_number
 
+# Notified every time a ContentContainer finishes extracting
+_extraction_condition = threading.Condition()
+
 
 @dataclass
 class Content(MediaType, metaclass=MetaMediaType):
@@ -27,6 +30,8 @@ class Content(MediaType, metaclass=MetaMediaType):
     output: str = field(init=False, default="")
     _parent = None
     _unwanted = False
+    # Function returning the streams, called once they're needed
+    _stream_resolver = None
 
     def __post_init__(self):
         # temporarily assign a parent container so unit tests don't fail
@@ -40,6 +45,26 @@ class Content(MediaType, metaclass=MetaMediaType):
             stream._parent = self
             self.streams.append(stream)
 
+    def set_stream_resolver(self, resolver: Callable[[], List[Stream]]) -> None:
+        """
+        Defer getting the streams until `resolve_streams` is called
+
+        :param resolver: Function returning the content's streams
+        """
+        self._stream_resolver = resolver
+
+    def resolve_streams(self) -> List[Stream]:
+        """
+        Get the streams with the resolver, if one has been set and
+        not yet called
+
+        :return: The content's streams
+        """
+        if self._stream_resolver is not None:
+            resolver, self._stream_resolver = self._stream_resolver, None
+            self.streams = resolver()
+        return self.streams
+
     def get_stream_by_id(self, stream_id: str) -> Stream:
         stream = [s for s in self.streams if s.id == stream_id]
         if stream:
@@ -147,10 +172,16 @@ class ContentContainer(MediaType, metaclass=MetaMediaType):
         # this method is for consistency with Content objects
         self._unwanted = True
 
+    def set_extracted(self) -> None:
+        """Marks the extraction as finished, waking up waiting threads"""
+        with _extraction_condition:
+            self._extracted = True
+            _extraction_condition.notify_all()
+
     def halt_until_extracted(self):
         """Sleep until extraction has finished, useful for scripting"""
-        while not self._extracted:
-            sleep(0.1)
+        with _extraction_condition:
+            _extraction_condition.wait_for(lambda: self._extracted)
 
 
 @dataclass
@@ -211,7 +242,7 @@ class Episode(Content):
         Since a lot of streaming services have movies as episodes,
         this method returns a Movie object equivalent to the Episode object
         """
-        return Movie(
+        movie = Movie(
             title=self.title,
             id=self.id,
             extractor=self.extractor,
@@ -222,6 +253,9 @@ class Episode(Content):
             images=self.images,
             streams=self.streams,
         )
+        # Keep the deferred streams, if they haven't been requested yet
+        movie._stream_resolver = self._stream_resolver
+        return movie
 
 
 @dataclass
@@ -1,46 +1,199 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, List
+
 from polarity.config import paths
 from polarity.utils import ContentIdentifier
 
-from typing import List
+try:
+    import fcntl
+except ImportError:
+    # Windows, the log is only locked between threads
+    fcntl = None
 
 
 class DownloadLog:
+    """
+    Log of downloaded content identifiers, one per line
+
+    Identifiers are kept in a set, and new ones are appended to the file
+    instead of rewriting it. Before every operation the file is checked for
+    changes made by other Polarity instances, reading only the lines added
+    since the last check. Once the file has too many duplicate or empty
+    lines it's rewritten without them
+
+    >>> log = DownloadLog("/tmp/download.log")
+    >>> log.add("crunchyroll/episode-GRVNXXXXX")
+    >>> log.in_log("crunchyroll/episode-GRVNXXXXX")
+    True
+    """
+
+    # Duplicate and empty lines allowed before rewriting the file
+    COMPACT_THRESHOLD = 1000
+
     def __init__(self, path: str = paths["dl_log"], update_path: bool = True) -> None:
         self.__path = path
         self.__update = update_path
-        self.__entries = self._load_log()
+        self.__lock = threading.Lock()
+        self._reset()
+        with self.__lock:
+            self._refresh()
 
     def add(self, id: str):
         identifier = id.string if type(id) is ContentIdentifier else id
-        self.__entries = self._load_log()
-        # add the entry
-        if not self.in_log(id):
-            self.__entries.append(identifier)
-            # save log to file
-            self._save_log()
+        with self.__lock:
+            self._refresh()
+            if identifier in self.__entries:
+                return
+            with self._open_locked("a+b", exclusive=True) as f:
+                # Other instances could have appended since the refresh
+                self._refresh(f)
+                if identifier in self.__entries:
+                    return
+                line = f"{identifier}\n"
+                if self.__offset and not self.__ends_with_newline:
+                    # Logs written by older versions don't end in a newline
+                    line = f"\n{line}"
+                f.write(line.encode())
+                f.flush()
+                self._read_new_lines(f)
 
     def in_log(self, id: str) -> bool:
         """Returns True if content identifier is in download log"""
-        # update the log entries
-        self.__entries = self._load_log()
         # if id is a contentidentifier object, get the raw_string
         identifier = id.string if type(id) is ContentIdentifier else id
-        return identifier in self.__entries
+        with self.__lock:
+            self._refresh()
+            return identifier in self.__entries
+
+    def compact(self) -> None:
+        """Rewrites the log file without duplicate and empty lines"""
+        with self.__lock, self._open_locked("r+b", exclusive=True) as f:
+            self._refresh(f)
+            self._compact(f)
+
+    @contextmanager
+    def _open_locked(self, mode: str, exclusive=False) -> Iterator[BinaryIO]:
+        while True:
+            with open(self.__path, mode) as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    # The file could have been replaced by a compaction while
+                    # waiting for the lock, if so open the new one
+                    if (
+                        fcntl is None
+                        or os.fstat(f.fileno()).st_ino == os.stat(self.__path).st_ino
+                    ):
+                        yield f
+                        return
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
 
-    def _load_log(self) -> List[str]:
-        if self.__update:
+    def _refresh(self, f: BinaryIO = None) -> None:
+        """
+        Loads the changes to the log file since the last call
+
+        :param f: The log file, already opened and locked
+        """
+        if self.__update and self.__path != paths["dl_log"]:
             self.__path = paths["dl_log"]
-        self.__log = open(self.__path).read()
-        return self.__log.split("\n")
+            self.__stat = None
+        try:
+            stat = os.stat(self.__path)
+        except FileNotFoundError:
+            self._reset()
+            return
+        if self.__stat == (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+            return
+        if (
+            self.__stat is None
+            or stat.st_ino != self.__stat[0]
+            or stat.st_size <= self.__offset
+        ):
+            # The file has been replaced or rewritten, read it again
+            self._reset()
+        if f is not None:
+            self._read_new_lines(f)
+            return
+        with self._open_locked("rb") as f:
+            self._read_new_lines(f)
+        if self.__lines - len(self.__entries) > self.COMPACT_THRESHOLD:
+            with self._open_locked("r+b", exclusive=True) as f:
+                self._read_new_lines(f)
+                self._compact(f)
+
+    def _reset(self) -> None:
+        self.__entries = set()
+        # Lines read, including duplicate and empty ones
+        self.__lines = 0
+        # Bytes of the file already read
+        self.__offset = 0
+        # Inode, modification time and size of the file when last read
+        self.__stat = None
+        self.__last_line = ""
+        self.__ends_with_newline = True
+
+    def _read_new_lines(self, f: BinaryIO) -> None:
+        f.seek(self.__offset)
+        data = f.read()
+        if data:
+            self.__offset += len(data)
+            text = data.decode()
+            if not self.__ends_with_newline:
+                # The first line continues the last one read
+                text = self.__last_line + text
+                self.__lines -= 1
+            lines = text.split("\n")
+            if text.endswith("\n"):
+                lines.pop()
+            self.__entries.update(line.strip() for line in lines)
+            self.__entries.discard("")
+            self.__lines += len(lines)
+            self.__last_line = lines[-1] if lines else ""
+            self.__ends_with_newline = text.endswith("\n")
+        stat = os.fstat(f.fileno())
+        self.__stat = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
 
-    def _save_log(self):
-        with open(self.__path, "w") as f:
-            f.write("\n".join(self.__entries))
+    def _compact(self, f: BinaryIO) -> None:
+        """
+        Replaces the log file with a compacted copy, other instances notice
+        the inode change and read it again, instead of reading the new
+        lines from an offset of the old file
+
+        :param f: The log file, already opened and locked exclusively
+        """
+        data = "".join(f"{entry}\n" for entry in sorted(self.__entries)).encode()
+        temp_path = f"{self.__path}.tmp"
+        with open(temp_path, "wb") as temp:
+            temp.write(data)
+        try:
+            os.replace(temp_path, self.__path)
+        except PermissionError:
+            # Windows, files can't be replaced while open, rewrite it in place
+            os.remove(temp_path)
+            f.seek(0)
+            f.write(data)
+            f.truncate()
+            f.flush()
+        self.__lines = len(self.__entries)
+        self.__offset = len(data)
+        self.__last_line = ""
+        self.__ends_with_newline = True
+        stat = os.stat(self.__path)
+        self.__stat = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
 
     @property
     def entries(self) -> List[str]:
-        return self.__entries
+        with self.__lock:
+            self._refresh()
+            return sorted(self.__entries)
 
     @property
     def path(self):
         return self.__path
+
+
+download_log = DownloadLog()
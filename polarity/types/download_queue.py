@@ -0,0 +1,87 @@
+import threading
+from itertools import count
+from queue import PriorityQueue
+from time import time
+from typing import Tuple
+
+from polarity.types.content import Content
+
+
+class DownloadQueue:
+    """
+    Bounded priority queue of extracted content waiting to be downloaded
+
+    Content is taken by series order, then season and episode number, so
+    episodes get downloaded in order even if extracted out of order. If the
+    queue is full, `put` blocks the extractor until a download task takes an
+    item, so extraction doesn't get too far ahead of the downloads
+
+    >>> queue = DownloadQueue(maxsize=20)
+    >>> queue.put(episode, order=0)
+    >>> queue.get()
+    Episode(...)
+    >>> queue.close(consumers=1)
+    >>> queue.get() is None
+    True
+    """
+
+    # Priority of the sentinels, sorted after any content
+    _CLOSED = (float("inf"),)
+
+    def __init__(self, maxsize: int = 0) -> None:
+        self.maxsize = maxsize
+        self._queue = PriorityQueue(maxsize)
+        # Tie-breaker, keeps insertion order between same priority items
+        self._counter = count()
+        self._lock = threading.Lock()
+        # Metrics
+        self.added = 0
+        self.peak_depth = 0
+        self.blocked_time = 0.0
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    @staticmethod
+    def priority(content: Content, order: int = 0) -> Tuple[int, int, int]:
+        """
+        :param content: Content to get the priority of
+        :param order: Order of the series or URL the content belongs to
+        :return: A tuple, lower values are downloaded first
+        """
+        season = getattr(content, "_season", None)
+        season_number = season.number if season is not None else None
+        return (order, season_number or 0, getattr(content, "number", None) or 0)
+
+    def put(self, content: Content, order: int = 0) -> None:
+        """
+        Add content to the queue, blocks while the queue is full
+
+        :param content: Content to add
+        :param order: Order of the series or URL the content belongs to
+        """
+        start = time()
+        self._queue.put((self.priority(content, order), next(self._counter), content))
+        with self._lock:
+            self.added += 1
+            self.blocked_time += time() - start
+            self.peak_depth = max(self.peak_depth, len(self))
+
+    def get(self) -> Content:
+        """
+        Take the content with the highest priority, blocks while the queue
+        is empty
+
+        :return: A Content object, None if the queue has been closed
+        """
+        _, _, content = self._queue.get()
+        return content
+
+    def close(self, consumers: int) -> None:
+        """
+        Makes `get` return None once the queued content has been taken
+
+        :param consumers: Number of threads taking content from the queue
+        """
+        for _ in range(consumers):
+            self._queue.put((self._CLOSED, next(self._counter), None))
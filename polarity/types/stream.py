@@ -81,6 +81,9 @@ class SegmentPool(MediaType, metaclass=MetaMediaType):
     media_type: str
     # Specifies the type of the pool
     pool_type: str = None
+    # Size in bytes of the pool's output file, if set, segments are written
+    # directly to the output file at their byte range's offset
+    output_size: int = None
     _id: str = field(init=True, default=None)
     _finished = False
     _reserved = False
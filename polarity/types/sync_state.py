@@ -0,0 +1,87 @@
+import json
+import threading
+from contextlib import contextmanager
+from time import time
+from typing import Dict, Iterator, TextIO
+
+from polarity.config import paths
+
+try:
+    import fcntl
+except ImportError:
+    # Windows, the file is only locked between threads
+    fcntl = None
+
+
+class SyncState:
+    """
+    State of the series synced with the `sync` action, stored as a JSON file
+    next to the download log
+
+    Every series keeps it's episode count and seasons from the last run,
+    with the identifiers of the content queued for download from each
+    season, so the next run can skip the seasons without new content
+
+    >>> state = SyncState("/tmp/sync.json")
+    >>> state.update("crunchyroll/series-GXXXXXXXX", {"episode_count": 12})
+    >>> state.get("crunchyroll/series-GXXXXXXXX")["episode_count"]
+    12
+    """
+
+    def __init__(self, path: str = paths["sync_state"], update_path: bool = True) -> None:
+        self.__path = path
+        self.__update = update_path
+        self.__lock = threading.Lock()
+
+    def get(self, series_id: str) -> dict:
+        """
+        :param series_id: Content identifier of the series
+        :return: The state of the series, empty if it has never been synced
+        """
+        with self.__lock, self._open_locked() as f:
+            return self._load(f).get(series_id, {})
+
+    def update(self, series_id: str, state: dict) -> None:
+        """
+        Replace the state of a series, keeping the rest
+
+        :param series_id: Content identifier of the series
+        :param state: New state of the series
+        """
+        with self.__lock, self._open_locked(exclusive=True) as f:
+            # Other instances could have synced other series meanwhile
+            states = self._load(f)
+            states[series_id] = {**state, "updated": int(time())}
+            f.seek(0)
+            f.truncate()
+            json.dump(states, f, indent=2)
+            f.flush()
+
+    @contextmanager
+    def _open_locked(self, exclusive=False) -> Iterator[TextIO]:
+        if self.__update:
+            self.__path = paths["sync_state"]
+        with open(self.__path, "a+") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield f
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _load(f: TextIO) -> Dict[str, dict]:
+        f.seek(0)
+        try:
+            return json.loads(f.read() or "{}")
+        except ValueError:
+            # Broken file, series are synced from scratch and it's rewritten
+            return {}
+
+    @property
+    def path(self):
+        return self.__path
+
+
+sync_state = SyncState()
@@ -1,4 +1,5 @@
 import errno
+import hashlib
 import json
 import logging
 import ntpath
@@ -6,6 +7,9 @@ import os
 import re
 import shutil
 import sys
+import threading
+import weakref
+from collections import OrderedDict
 from copy import deepcopy
 from dataclasses import dataclass
 from datetime import datetime
@@ -13,7 +17,7 @@ from json.decoder import JSONDecodeError
 from shutil import which
 from sys import platform
 from time import sleep, time
-from typing import Dict, Iterable, List, Tuple, Union
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple, Union
 from urllib.parse import urlparse
 from xml.parsers.expat import ExpatError
 
@@ -22,6 +26,7 @@ import requests
 import xmltodict
 from requests.adapters import HTTPAdapter
 from requests.models import Response
+from requests.structures import CaseInsensitiveDict
 from tqdm import tqdm
 from urllib3.util.retry import Retry
 
@@ -30,9 +35,18 @@ retry_config = Retry(
 )
 # create the requests session
 session = cloudscraper.create_scraper()
-# mount adapters
+# mount adapters, connection pools are resized with `set_pool_size`
 session.mount("http://", HTTPAdapter(max_retries=retry_config))
 session.mount("https://", HTTPAdapter(max_retries=retry_config))
+# connection pool sizes of the sessions, (pool_connections, pool_maxsize)
+pool_size = (10, 10)
+# if True, every thread makes requests with it's own session
+per_thread_sessions = False
+thread_data = threading.local()
+# sessions created by threads, and usage of the ones from finished threads
+thread_sessions = weakref.WeakSet()
+retired_usage = {}
+usage_lock = threading.Lock()
 # https://stackoverflow.com/questions/38015537
 requests.packages.urllib3.util.ssl_.DEFAULT_CIPHERS += "HIGH:!DH:!aNULL"
 
@@ -451,6 +465,7 @@ def filename_datetime() -> str:
 @dataclass(frozen=True)
 class ContentIdentifier:
     "Content-unique global identifier"
+
     extractor: str
     content_type: str
     id: str
@@ -514,44 +529,423 @@ def toggle_request_dumping() -> bool:
     return dump_requests
 
 
-def request_webpage(url: str, method: str = "get", **kwargs) -> Response:
+def set_pool_size(pool_connections: int = 10, pool_maxsize: int = 10) -> None:
+    """
+    Mount the session's adapters with new connection pool sizes
+
+    :param pool_connections: number of hosts to keep a connection pool for
+    :param pool_maxsize: connections kept open per host, requests made
+    while all connections are in use open a new connection which is
+    discarded afterwards
+    """
+    global pool_size
+    pool_size = (pool_connections, pool_maxsize)
+    mount_adapters(session)
+
+
+def mount_adapters(_session: requests.Session) -> None:
+    for prefix in ("http://", "https://"):
+        _session.mount(
+            prefix,
+            HTTPAdapter(
+                max_retries=retry_config,
+                pool_connections=pool_size[0],
+                pool_maxsize=pool_size[1],
+            ),
+        )
+
+
+def set_session_mode(per_thread: bool) -> None:
+    """
+    :param per_thread: if True, every thread makes requests with it's own
+    session, created from the shared session's headers and cookies,
+    otherwise all threads use the shared session
+    """
+    global per_thread_sessions
+    per_thread_sessions = per_thread
+
+
+def get_session() -> requests.Session:
+    """
+    :return: The calling thread's session if per-thread sessions are
+    enabled, the shared session otherwise
+    """
+    if not per_thread_sessions:
+        return session
+    if not hasattr(thread_data, "session"):
+        thread_session = cloudscraper.create_scraper()
+        thread_session.headers.update(session.headers)
+        thread_session.cookies.update(session.cookies)
+        mount_adapters(thread_session)
+        thread_data.session = thread_session
+        thread_sessions.add(thread_session)
+        # Keep the session's usage after the thread finishes
+        weakref.finalize(threading.current_thread(), retire_session, thread_session)
+    return thread_data.session
+
+
+def retire_session(_session: requests.Session) -> None:
+    with usage_lock:
+        thread_sessions.discard(_session)
+        for host, usage in get_session_usage(_session).items():
+            retired = retired_usage.setdefault(host, dict.fromkeys(usage, 0))
+            for key, value in usage.items():
+                retired[key] += value
+    _session.close()
+
+
+def get_session_usage(_session: requests.Session) -> Dict[str, Dict[str, int]]:
+    usage = {}
+    for prefix in ("http://", "https://"):
+        pools = _session.get_adapter(prefix).poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            usage[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                "requests": pool.num_requests,
+                "connections": pool.num_connections,
+                "size": pool.pool.maxsize if pool.pool is not None else 0,
+            }
+    return usage
+
+
+def get_pool_usage() -> Dict[str, Dict[str, int]]:
+    """
+    Get the usage of the sessions' connection pools
+
+    :return: dict with hosts as keys, and the number of requests made and
+    connections opened as values, if a host has a lot more connections
+    than the pool size, connections are being discarded
+    """
+    with usage_lock:
+        usage = deepcopy(retired_usage)
+        for _session in [session, *thread_sessions]:
+            for host, _usage in get_session_usage(_session).items():
+                total = usage.setdefault(host, dict.fromkeys(_usage, 0))
+                for key, value in _usage.items():
+                    total[key] += value
+    return usage
+
+
+class TokenBucket:
+    """
+    Limits the rate of something, allowing bursts of up to a second worth
+    of rate
+
+    >>> bucket = TokenBucket(rate=10)
+    >>> bucket.reserve(15)
+    0.5
+    """
+
+    def __init__(self, rate: float) -> None:
+        self._lock = threading.Lock()
+        self.rate = rate
+        self._allowance = rate
+        self._last_refill = time()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take an amount from the bucket
+
+        :return: Seconds to wait before using the amount, 0 if unlimited
+        """
+        if not self.rate:
+            return 0
+        with self._lock:
+            now = time()
+            self._allowance = min(
+                self._allowance + (now - self._last_refill) * self.rate, self.rate
+            )
+            self._last_refill = now
+            self._allowance -= amount
+            if self._allowance >= 0:
+                return 0
+            return -self._allowance / self.rate
+
+
+class RateLimiter:
+    """
+    Per-host limits of requests and bytes per second, hosts have a separate
+    limit for each budget, `api` for extractor requests and `cdn` for segment
+    downloads. Bytes are counted from the responses' Content-Length header
+
+    >>> rate_limiter.set_limits({"api": {"requests": 5, "bytes": 0}})
+    >>> sleep(rate_limiter.request_delay("https://example.com/api", "api"))
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.limits = {}
+        self._buckets = {}
+        # Seconds requests have waited for each host
+        self.waited = {}
+
+    def set_limits(self, limits: Dict[str, Dict[str, float]]) -> None:
+        """
+        :param limits: dict with budgets as keys and dicts with `requests`
+        and `bytes` per second as values, 0 for unlimited
+        """
+        with self._lock:
+            self.limits = deepcopy(limits)
+            self._buckets = {}
+
+    def request_delay(self, url: str, budget: str = "api") -> float:
+        """
+        :return: Seconds to wait before making a request to the url
+        """
+        return self._reserve(url, budget, "requests", 1)
+
+    def response_delay(self, url: str, headers: dict, budget: str = "api") -> float:
+        """
+        :return: Seconds to wait before making more requests, according
+        to the size of a response of the url
+        """
+        if "Content-Length" not in headers:
+            return 0
+        return self._reserve(url, budget, "bytes", int(headers["Content-Length"]))
+
+    def _reserve(self, url: str, budget: str, kind: str, amount: int) -> float:
+        host = urlparse(url).netloc
+        with self._lock:
+            rate = self.limits.get(budget, {}).get(kind)
+            if not rate:
+                return 0
+            bucket = self._buckets.setdefault(
+                (budget, host, kind), TokenBucket(float(rate))
+            )
+        delay = bucket.reserve(amount)
+        if delay:
+            with self._lock:
+                self.waited[host] = self.waited.get(host, 0) + delay
+        return delay
+
+
+rate_limiter = RateLimiter()
+
+
+class ResponseCache:
+    """
+    On-disk cache of API responses, used by `request_json` and `request_xml`
+    when passing a `cache` argument with the endpoint class of the request
+
+    Responses are fresh for the endpoint class' TTL, after that they're
+    revalidated using their ETag or Last-Modified headers if the server sent
+    them. Once the cache grows over it's maximum size, the least recently
+    used responses are removed
+
+    Responses are keyed by URL and parameters, except request signing
+    parameters that change every session. Requests with cookies depend on the
+    user's session, and are never cached
+
+    >>> response_cache.configure("/tmp/cache/", 2**26, {"series": 86400})
+    >>> request_json("https://example.com/api/series/1", cache="series")
+    """
+
+    # Parameters with signatures and expiration dates, not part of the key
+    VOLATILE_PARAMS = ("Policy", "Signature")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.path = None
+        self.max_size = 0
+        self.ttl = {}
+        # Size of every cached response, least recently used first
+        self._index = OrderedDict()
+        self._size = 0
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0}
+
+    def configure(self, path: str, max_size: int, ttl: Dict[str, int]) -> None:
+        """
+        :param path: Directory to store the responses in, None to disable
+        the cache
+        :param max_size: Maximum size of the cache in bytes
+        :param ttl: Dict with endpoint classes as keys and the seconds their
+        responses are fresh for as values
+        """
+        with self._lock:
+            self.path = path
+            self.max_size = max_size
+            self.ttl = dict(ttl)
+            self._index = OrderedDict()
+            self._size = 0
+            if path is None:
+                return
+            os.makedirs(path, exist_ok=True)
+            entries = sorted(os.scandir(path), key=lambda e: e.stat().st_mtime)
+            for entry in entries:
+                self._index[entry.name] = entry.stat().st_size
+                self._size += entry.stat().st_size
+            self._evict()
+
+    def key(self, url: str, params: dict = None) -> str:
+        params = {
+            k: v for k, v in (params or {}).items() if k not in self.VOLATILE_PARAMS
+        }
+        data = json.dumps([url, sorted(params.items())], default=str)
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def request(self, url: str, method: str, endpoint: str = None, **kwargs) -> Response:
+        """
+        Make a request through the cache
+
+        :param endpoint: Endpoint class of the request, None to not cache it
+        :return: The response, from the server or the cache
+        """
+        if (
+            self.path is None
+            or endpoint is None
+            or method.lower() != "get"
+            or "cookies" in kwargs
+        ):
+            return request_webpage(url, method, **kwargs)
+
+        key = self.key(url, kwargs.get("params"))
+        cached = self._read(key)
+        if cached is not None:
+            meta, response = cached
+            if time() - meta["stored"] < self.ttl.get(endpoint, 0):
+                self._count("hits")
+                return response
+            # Revalidate the stale response
+            headers = dict(kwargs.get("headers") or {})
+            if meta["etag"] is not None:
+                headers["If-None-Match"] = meta["etag"]
+            if meta["last_modified"] is not None:
+                headers["If-Modified-Since"] = meta["last_modified"]
+            kwargs["headers"] = headers
+
+        fresh = request_webpage(url, method, **kwargs)
+        if cached is not None and fresh.status_code == 304:
+            self._count("revalidated")
+            self._write(key, meta, response.content)
+            return response
+        self._count("misses")
+        if fresh.status_code == 200:
+            meta = {
+                "url": fresh.url,
+                "headers": {"Content-Type": fresh.headers.get("Content-Type", "")},
+                "etag": fresh.headers.get("ETag"),
+                "last_modified": fresh.headers.get("Last-Modified"),
+            }
+            self._write(key, meta, fresh.content)
+        return fresh
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _read(self, key: str) -> Union[Tuple[dict, Response], None]:
+        with self._lock:
+            if key not in self._index:
+                return
+            try:
+                with open(f"{self.path}{key}", "rb") as f:
+                    # First line is the metadata, the rest is the content
+                    meta = json.loads(f.readline())
+                    content = f.read()
+            except (OSError, ValueError):
+                return
+            self._index.move_to_end(key)
+            try:
+                # Keep the access order between sessions
+                os.utime(f"{self.path}{key}")
+            except OSError:
+                # Removed by another instance, the content is already read
+                pass
+        response = Response()
+        response.status_code = 200
+        response.url = meta["url"]
+        response.headers = CaseInsensitiveDict(meta["headers"])
+        response._content = content
+        return meta, response
+
+    def _write(self, key: str, meta: dict, content: bytes) -> None:
+        meta = {**meta, "stored": time()}
+        data = json.dumps(meta).encode() + b"\n" + content
+        path = f"{self.path}{key}"
+        with self._lock:
+            try:
+                # Replace the file at once, concurrent readers never see a
+                # partially written response
+                with open(f"{path}.{threading.get_ident()}", "wb") as f:
+                    f.write(data)
+                os.replace(f"{path}.{threading.get_ident()}", path)
+            except OSError:
+                return
+            self._size += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self._evict()
+
+    def _evict(self) -> None:
+        """Removes the least recently used responses until fitting max_size"""
+        while self._size > self.max_size and self._index:
+            key, size = self._index.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(f"{self.path}{key}")
+            except OSError:
+                pass
+
+
+response_cache = ResponseCache()
+
+
+def request_webpage(
+    url: str, method: str = "get", rate_limit: str = "api", **kwargs
+) -> Response:
     """
     Make a HTTP request using the requests module
     `url` url to make the request to
     `method` http request method
+    `rate_limit` rate limiter budget of the request, `api` or `cdn`
     `kwargs` extra requests arguments, for more info check the [requests documentation](https://docs.python-requests.org/en/latest/user/quickstart/)
     """
     from polarity.lang import lang
 
     vprint(lang["polarity"]["requesting"] % url, "verbose")
+    _session = get_session()
     # check if method is valid
-    if not hasattr(session, method.lower()):
+    if not hasattr(_session, method.lower()):
         raise Exception(lang["polarity"]["except"]["invalid_http_method"] % method)
-    request = getattr(session, method.lower())(url, **kwargs)
+    sleep(rate_limiter.request_delay(url, rate_limit))
+    request = getattr(_session, method.lower())(url, **kwargs)
+    if method.lower() != "head":
+        # Pay for the response size before the next request, HEAD responses
+        # have the size of a body they don't include
+        sleep(rate_limiter.response_delay(url, request.headers, rate_limit))
 
     return request
 
 
-def request_json(url: str, method: str = "get", **kwargs) -> Tuple[Dict, Response]:
+def request_json(
+    url: str, method: str = "get", cache: str = None, **kwargs
+) -> Tuple[Dict, Response]:
     """
     Same as request_webpage, but returns a tuple with the json
     as a dict and the response object
     :param url:
+    :param cache: Endpoint class of the request, to cache the response
+    with that class' TTL, see `ResponseCache`
     """
 
-    response = request_webpage(url, method, **kwargs)
+    response = response_cache.request(url, method, cache, **kwargs)
     try:
         return (json.loads(response.content.decode()), response)
     except JSONDecodeError:
         return ({}, response)
 
 
-def request_xml(url: str, method: str = "get", **kwargs) -> Tuple[Dict, Response]:
+def request_xml(
+    url: str, method: str = "get", cache: str = None, **kwargs
+) -> Tuple[Dict, Response]:
     """
     Same as request_webpage, but returns a tuple with the xml
     as a dict and the response object
+    :param cache: Endpoint class of the request, to cache the response
+    with that class' TTL, see `ResponseCache`
     """
-    response = request_webpage(url, method, **kwargs)
+    response = response_cache.request(url, method, cache, **kwargs)
     try:
         return (xmltodict.parse(response.content.decode()), response)
     except ExpatError:
@@ -724,12 +1118,153 @@ def mkfile(
         with open(path, writing_mode, *args, **kwargs) as fp:
             fp.write(contents)
     except OSError as ex:
-        from polarity.lang import lang
+        exit_if_no_space(ex)
 
-        if ex.errno == errno.ENOSPC:
-            vprint(
-                lang["polarity"]["no_space_left"],
-                "critical",
-                lock_printing=True,
-            )
-            os._exit(1)
+
+def write_chunks(path: str, chunks: Iterable[bytes], overwrite=False) -> int:
+    """
+    Write an iterable of byte chunks to a file, without holding more than
+    a chunk in memory
+
+    Data is written to a `.part` file first, which is renamed to the final
+    path after the last chunk has been written
+
+    :param path: file path
+    :param chunks: iterable of bytes objects
+    :param overwrite: if false, won't overwrite a file if it does exist
+    :return: number of bytes written, or the size of the existing file
+    """
+    if os.path.exists(path) and not overwrite:
+        # Stop the chunk generator, so it releases the response
+        if hasattr(chunks, "close"):
+            chunks.close()
+        return os.path.getsize(path)
+    written = 0
+    try:
+        with open(f"{path}.part", "wb") as fp:
+            for chunk in chunks:
+                fp.write(chunk)
+                written += len(chunk)
+        os.replace(f"{path}.part", path)
+    except OSError as ex:
+        exit_if_no_space(ex)
+        raise
+    return written
+
+
+def write_at(fd: int, data: bytes, offset: int) -> int:
+    """
+    Write data to a file descriptor at an offset, without modifying
+    the file position, allows multiple threads writing to the same file
+
+    :param fd: file descriptor, opened for writing
+    :param data: bytes to write
+    :param offset: position of the file to write the data at
+    :return: number of bytes written
+    """
+    view = memoryview(data)
+    try:
+        while view:
+            # pwrite can write less bytes than requested
+            written = os.pwrite(fd, view, offset)
+            view = view[written:]
+            offset += written
+    except OSError as ex:
+        exit_if_no_space(ex)
+        raise
+    return len(data)
+
+
+def preallocate(fd: int, size: int) -> None:
+    """
+    Reserve disk space for a file, so running out of space is detected
+    before downloading and the file is not fragmented
+
+    Falls back to setting the file size if the platform or filesystem
+    does not support preallocation
+
+    :param fd: file descriptor, opened for writing
+    :param size: file size in bytes
+    """
+    try:
+        if hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(fd, 0, size)
+                return
+            except OSError as ex:
+                if ex.errno not in (errno.EINVAL, errno.EOPNOTSUPP):
+                    raise
+        os.ftruncate(fd, size)
+    except OSError as ex:
+        exit_if_no_space(ex)
+        raise
+
+
+# Errors raised by kernel copy functions when the files don't support them
+_KERNEL_COPY_ERRORS = (
+    errno.EBADF,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.ENOTSUP,
+    errno.EOPNOTSUPP,
+    errno.ETXTBSY,
+    errno.EXDEV,
+)
+
+
+def copy_file_data(
+    source: BinaryIO, destination: BinaryIO, chunk_size: int = 2**24
+) -> Iterator[int]:
+    """
+    Copy a file's data, from it's current position, to another file
+
+    The copy is done by the kernel using `os.copy_file_range` or, on Linux,
+    `os.sendfile` if available, falling back to a buffered copy otherwise
+
+    :param source: file object opened for reading
+    :param destination: file object opened for writing, must not be opened
+    in append mode for the kernel copy to work
+    :param chunk_size: maximum number of bytes copied per step
+    :return: iterator of the number of bytes copied in each step
+    """
+    destination.flush()
+    src, dst = source.fileno(), destination.fileno()
+    for method in ("copy_file_range", "sendfile"):
+        if not hasattr(os, method):
+            continue
+        if method == "sendfile" and platform != "linux":
+            # Other systems only send files to sockets, and require an offset
+            continue
+        copied = 0
+        try:
+            while True:
+                if method == "copy_file_range":
+                    step = os.copy_file_range(src, dst, chunk_size)
+                else:
+                    step = os.sendfile(dst, src, None, chunk_size)
+                if not step:
+                    return
+                copied += step
+                yield step
+        except OSError as ex:
+            exit_if_no_space(ex)
+            # Only try the next method if the filesystem does not support
+            # this one, and nothing has been copied yet
+            if copied or ex.errno not in _KERNEL_COPY_ERRORS:
+                raise
+    start = source.tell()
+    shutil.copyfileobj(source, destination, chunk_size)
+    yield source.tell() - start
+
+
+def exit_if_no_space(ex: OSError) -> None:
+    """Exit if an OSError has been caused by a full disk"""
+    from polarity.lang import lang
+
+    if ex.errno == errno.ENOSPC:
+        vprint(
+            lang["polarity"]["no_space_left"],
+            "critical",
+            lock_printing=True,
+        )
+        os._exit(1)
@@ -0,0 +1,88 @@
+from polarity.types.download_log import DownloadLog
+
+
+def create_log(tmp_path, content: str = "") -> DownloadLog:
+    path = tmp_path / "download.log"
+    path.write_text(content)
+    return DownloadLog(str(path), update_path=False)
+
+
+def test_add_appends(tmp_path):
+    log = create_log(tmp_path, "crunchyroll/episode-A\n")
+    log.add("crunchyroll/episode-B")
+    log.add("crunchyroll/episode-B")
+    assert (tmp_path / "download.log").read_text() == (
+        "crunchyroll/episode-A\ncrunchyroll/episode-B\n"
+    )
+    assert log.in_log("crunchyroll/episode-A")
+    assert log.in_log("crunchyroll/episode-B")
+    assert not log.in_log("crunchyroll/episode-C")
+
+
+def test_old_log_format(tmp_path):
+    # Older versions joined the entries without a trailing newline
+    log = create_log(tmp_path, "\ncrunchyroll/episode-A\ncrunchyroll/episode-B")
+    assert log.entries == ["crunchyroll/episode-A", "crunchyroll/episode-B"]
+    log.add("crunchyroll/episode-C")
+    assert (
+        (tmp_path / "download.log")
+        .read_text()
+        .endswith("crunchyroll/episode-B\ncrunchyroll/episode-C\n")
+    )
+    assert log.in_log("crunchyroll/episode-B")
+    assert log.in_log("crunchyroll/episode-C")
+
+
+def test_changes_from_other_instances(tmp_path):
+    log = create_log(tmp_path)
+    other = DownloadLog(log.path, update_path=False)
+    other.add("atresplayer/episode-A")
+    assert log.in_log("atresplayer/episode-A")
+    # Log replaced by a different file
+    (tmp_path / "download.log").write_text("atresplayer/episode-B\n")
+    assert log.entries == ["atresplayer/episode-B"]
+
+
+def test_compact(tmp_path, monkeypatch):
+    monkeypatch.setattr(DownloadLog, "COMPACT_THRESHOLD", 3)
+    log = create_log(tmp_path, "a\n\na\nb\n")
+    assert (tmp_path / "download.log").read_text() == "a\n\na\nb\n"
+    with open(log.path, "a") as f:
+        f.write("b\n\n")
+    # Over the threshold, duplicate and empty lines are removed
+    assert log.entries == ["a", "b"]
+    assert (tmp_path / "download.log").read_text() == "a\nb\n"
+    log.add("c")
+    assert (tmp_path / "download.log").read_text() == "a\nb\nc\n"
+
+
+def test_compact_other_instances(tmp_path):
+    log = create_log(tmp_path, "a\n\na\nb\nb\n\n")
+    other = DownloadLog(log.path, update_path=False)
+    assert other.entries == ["a", "b"]
+    log.compact()
+    assert (tmp_path / "download.log").read_text() == "a\nb\n"
+    for entry in "cdef":
+        log.add(entry)
+    # The compacted log is longer than what the other instance had read,
+    # it must be read again instead of continuing from the old offset
+    assert other.entries == ["a", "b", "c", "d", "e", "f"]
+    other.add("g")
+    assert log.entries == ["a", "b", "c", "d", "e", "f", "g"]
+    assert not (tmp_path / "download.log.tmp").exists()
+
+
+def test_extractor_skips_downloaded(tmp_path, monkeypatch):
+    from polarity.config import options
+    from polarity.extractor import base
+    from polarity.types import Episode
+
+    log = create_log(tmp_path, "crunchyroll/episode-A\n")
+    monkeypatch.setattr(base, "download_log", log)
+    monkeypatch.setitem(options, "action", "download")
+    extractor = base.ContentExtractor()
+    downloaded = Episode("Episode", "A", extractor="Crunchyroll")
+    assert extractor.is_downloaded(downloaded)
+    assert not extractor.is_downloaded(Episode("Episode", "B", extractor="Crunchyroll"))
+    monkeypatch.setitem(options["download"], "redownload", True)
+    assert not extractor.is_downloaded(downloaded)
@@ -0,0 +1,39 @@
+import threading
+
+from polarity.types import Episode, Movie, Season
+from polarity.types.download_queue import DownloadQueue
+
+
+def create_episode(season: int, number: int) -> Episode:
+    episode = Episode(f"Episode {number}", f"{season}-{number}", number=number)
+    episode._season = Season("Season", str(season), number=season)
+    return episode
+
+
+def test_episode_order():
+    queue = DownloadQueue()
+    queue.put(create_episode(2, 1), order=0)
+    queue.put(create_episode(1, 2), order=0)
+    queue.put(Movie("Movie", "movie"), order=1)
+    queue.put(create_episode(1, 1), order=0)
+    queue.close(consumers=1)
+    taken = [queue.get() for _ in range(4)]
+    assert [c.id for c in taken] == ["1-1", "1-2", "2-1", "movie"]
+    assert queue.get() is None
+    assert queue.added == 4
+    assert queue.peak_depth == 4
+
+
+def test_backpressure():
+    queue = DownloadQueue(maxsize=1)
+    queue.put(create_episode(1, 1))
+    producer = threading.Thread(target=queue.put, args=(create_episode(1, 2),))
+    producer.start()
+    producer.join(0.1)
+    # the queue is full, the producer waits for a consumer
+    assert producer.is_alive()
+    assert queue.get().id == "1-1"
+    producer.join(1)
+    assert not producer.is_alive()
+    assert queue.get().id == "1-2"
+    assert queue.blocked_time > 0
@@ -0,0 +1,48 @@
+import threading
+import time
+
+from polarity.extractor.base import ContentExtractor
+
+
+def create_extractor(fetch_workers: int) -> ContentExtractor:
+    extractor = ContentExtractor.__new__(ContentExtractor)
+    extractor.extractor_name = "Test"
+    extractor.options = {"fetch_workers": fetch_workers}
+    return extractor
+
+
+def test_results_in_order():
+    def fetch(number: int) -> int:
+        # later items finish first
+        time.sleep((10 - number) / 1000)
+        return number * 2
+
+    results = create_extractor(4)._fetch_concurrently(fetch, range(10))
+    assert list(results) == [n * 2 for n in range(10)]
+
+
+def test_bounded_concurrency():
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def fetch(number: int) -> int:
+        with lock:
+            running.append(number)
+            peak.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.remove(number)
+        return number
+
+    assert list(create_extractor(3)._fetch_concurrently(fetch, range(12))) == list(
+        range(12)
+    )
+    assert 1 < max(peak) <= 3
+    # a single worker fetches in the calling thread
+    thread_names = set()
+    for _ in create_extractor(1)._fetch_concurrently(
+        lambda n: thread_names.add(threading.current_thread().name), range(3)
+    ):
+        pass
+    assert thread_names == {threading.current_thread().name}
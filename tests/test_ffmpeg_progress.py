@@ -0,0 +1,34 @@
+from polarity.downloader.penguin import parse_ffmpeg_progress
+
+PROGRESS = """frame=120
+total_size=1048576
+out_time=00:00:05.000000
+progress=continue
+frame=240
+total_size=N/A
+progress=continue
+total_size=2097152
+progress=end
+"""
+
+
+def test_parse_progress_blocks():
+    updates = list(parse_ffmpeg_progress(PROGRESS.splitlines(keepends=True)))
+    assert updates == [
+        {"total_size": "1048576", "progress": "continue"},
+        # Unknown sizes keep the last known one
+        {"total_size": "1048576", "progress": "continue"},
+        {"total_size": "2097152", "progress": "end"},
+    ]
+
+
+def test_parse_progress_is_incremental():
+    def lines():
+        yield "total_size=10\n"
+        yield "progress=continue\n"
+        raise AssertionError("read past the first update")
+
+    assert next(parse_ffmpeg_progress(lines())) == {
+        "total_size": "10",
+        "progress": "continue",
+    }
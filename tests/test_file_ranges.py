@@ -0,0 +1,65 @@
+import pytest
+
+from polarity.config import options
+from polarity.downloader.protocols import file
+from polarity.downloader.protocols.file import FileProtocol, RangeStats, range_stats
+from polarity.types import Stream
+
+MiB = 1024**2
+
+
+def get_protocol(workers: int = None, **penguin) -> FileProtocol:
+    _options = {"penguin": {**options["download"]["penguin"], **penguin}}
+    return FileProtocol(
+        Stream("https://example.com/video.mp4", {}, {}, True), _options, workers
+    )
+
+
+@pytest.mark.parametrize("content_size", [1, MiB, 5 * MiB + 7, 4096 * MiB])
+def test_ranges_cover_file(content_size: int):
+    ranges = list(get_protocol().calculate_ranges(content_size))
+    start = 0
+    for byte_range in ranges:
+        assert int(byte_range.split("-")[0]) == start
+        start += FileProtocol.range_size(byte_range)
+    assert start == content_size
+
+
+def test_range_sizes_grow():
+    protocol = get_protocol(threads=4, max_range_size=16 * MiB)
+    sizes = [FileProtocol.range_size(r) for r in protocol.calculate_ranges(4096 * MiB)]
+    assert sizes[:6] == [MiB, 2 * MiB, 4 * MiB, 8 * MiB, 16 * MiB, 16 * MiB]
+    # 4 GiB used to be split in 4096 ranges
+    assert len(sizes) < 300
+
+
+def test_range_size_inflight_limit():
+    protocol = get_protocol(threads=8, max_inflight_bytes=32 * MiB)
+    assert protocol.target_range_size(4096 * MiB) == 4 * MiB
+
+
+def test_range_size_allocated_workers():
+    # The download's share of the budget is used over the configured threads
+    protocol = get_protocol(workers=16, threads=8, max_inflight_bytes=32 * MiB)
+    assert protocol.target_range_size(4096 * MiB) == 2 * MiB
+
+
+def test_range_size_from_stats(monkeypatch):
+    stats = RangeStats()
+    # 10 MiB/s with 0.1s of latency
+    stats.record(MiB, 0.1, 0.2)
+    monkeypatch.setattr(range_stats, "throughput", stats.throughput)
+    monkeypatch.setattr(range_stats, "latency", stats.latency)
+    assert get_protocol().target_range_size(4096 * MiB) == int(10 * MiB * 0.1 * 9)
+
+
+def test_empty_file(monkeypatch):
+    class Response:
+        headers = {"Accept-Ranges": "bytes", "Content-Length": "0"}
+
+    monkeypatch.setattr(file, "request_webpage", lambda *args, **kwargs: Response())
+    (pool,) = get_protocol().process()
+    # Downloaded in one request instead of leaving the pool without segments
+    assert len(pool.segments) == 1
+    assert pool.segments[0].byte_range is None
+    assert pool.output_size is None
@@ -0,0 +1,42 @@
+from polarity.extractor.base import ContentExtractor
+from polarity.types import Episode, Stream
+
+
+def create_resolver(calls: list):
+    def resolver():
+        calls.append(None)
+        return [Stream("https://example.com/master.m3u8", {}, {}, True, id="stream")]
+
+    return resolver
+
+
+def test_resolve_streams_once():
+    calls = []
+    episode = Episode("Episode", "A")
+    episode.set_stream_resolver(create_resolver(calls))
+    assert not episode.streams
+    assert episode.resolve_streams()[0].id == "stream"
+    assert episode.resolve_streams() is episode.streams
+    assert len(calls) == 1
+
+
+def test_set_streams():
+    calls = []
+    extractor = ContentExtractor()
+    lazy = Episode("Episode", "A")
+    extractor.options = {"lazy_streams": True}
+    extractor.set_streams(lazy, create_resolver(calls))
+    assert not lazy.streams and not calls
+    eager = Episode("Episode", "B")
+    extractor.options["lazy_streams"] = False
+    extractor.set_streams(eager, create_resolver(calls))
+    assert eager.streams and len(calls) == 1
+
+
+def test_as_movie_keeps_resolver():
+    calls = []
+    episode = Episode("Episode", "A")
+    episode.set_stream_resolver(create_resolver(calls))
+    movie = episode.as_movie()
+    assert movie.resolve_streams()[0].id == "stream"
+    assert len(calls) == 1
@@ -0,0 +1,48 @@
+import logging
+import os
+
+from polarity.config import options
+from polarity.downloader.penguin import PenguinDownloader
+from polarity.types.stream import Segment, SegmentPool
+
+VTT = b"WEBVTT\n\n00:00.000 --> 00:01.000\n# Italic line #\n\n00:01.000 --> 00:02.000\nIt&apos;s\n"
+
+
+def create_downloader(tmp_path) -> PenguinDownloader:
+    # Writing segments doesn't need the download to be set up
+    downloader = object.__new__(PenguinDownloader)
+    downloader.options = {"penguin": {**options["download"]["penguin"]}}
+    downloader.options["penguin"]["direct_write"] = True
+    downloader.temp_path = str(tmp_path)
+    downloader.content = {"name": "Episode"}
+    downloader.logger = (logging.getLogger("penguin-test"), "verbose")
+    downloader.output_files = {}
+    return downloader
+
+
+def test_direct_write_multi_range_vtt(tmp_path):
+    downloader = create_downloader(tmp_path)
+    ranges = ["0-39", f"40-{len(VTT) - 1}"]
+    pool = SegmentPool(
+        [
+            Segment("https://example.com/subs.vtt", i, byte_range=r)
+            for i, r in enumerate(ranges)
+        ],
+        "subtitles",
+        "file",
+        output_size=len(VTT),
+    )
+    pool.set_id("subtitles0")
+    # The fixed subtitles are shorter than the byte ranges
+    assert not downloader._can_direct_write(pool)
+    pool.output_size = None
+    downloader.download_data = {"segment_pools": [pool]}
+    downloader._open_output_files()
+    for segment in pool.segments:
+        start, end = (int(i) for i in segment.byte_range.split("-"))
+        chunks = [VTT[start : end + 1]]
+        downloader._write_segment(segment, downloader._segment_chunks(segment, chunks))
+    downloader.temp_files = list(os.scandir(tmp_path))
+    downloader.merge_segments(pool)
+    with open(f"{tmp_path}/subtitles0.vtt", "rb") as f:
+        assert f.read() == PenguinDownloader.fix_vtt(VTT)
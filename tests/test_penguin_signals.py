@@ -0,0 +1,64 @@
+import threading
+
+from polarity.downloader.penguin import PenguinDownloader
+
+
+def create_downloader(thread_id: int) -> PenguinDownloader:
+    # Signal handling doesn't need the download to be set up
+    downloader = object.__new__(PenguinDownloader)
+    downloader._thread_id = thread_id
+    downloader.hooks = {}
+    downloader.stopped = False
+    return downloader
+
+
+def start_worker(downloader: PenguinDownloader) -> dict:
+    result = {}
+    worker = threading.Thread(
+        target=lambda: result.update(stop=downloader._process_signals("worker")),
+        daemon=True,
+    )
+    worker.start()
+    result["thread"] = worker
+    return result
+
+
+def test_pause_resumes_on_clear():
+    downloader = create_downloader(1001)
+    downloader.set_signal("pause")
+    result = start_worker(downloader)
+    result["thread"].join(0.2)
+    assert result["thread"].is_alive()
+    downloader.clear_signal()
+    result["thread"].join(1)
+    assert not result["thread"].is_alive()
+    assert result["stop"] is False
+    assert not downloader.stopped
+
+
+def test_pause_then_stop():
+    downloader = create_downloader(1002)
+    downloader.set_signal("pause", all_downloaders=True)
+    try:
+        result = start_worker(downloader)
+        result["thread"].join(0.2)
+        assert result["thread"].is_alive()
+        downloader.set_signal("stop", all_downloaders=True)
+        result["thread"].join(1)
+        assert result["stop"] is True
+        assert downloader.stopped
+    finally:
+        downloader.clear_signal(all_downloaders=True)
+
+
+def test_pause_resumes_on_direct_change():
+    downloader = create_downloader(1003)
+    downloader.set_signal("pause")
+    result = start_worker(downloader)
+    result["thread"].join(0.2)
+    assert result["thread"].is_alive()
+    # Older callers clear the signal without notifying the waiters
+    del PenguinDownloader._SIGNAL[1003]
+    result["thread"].join(2)
+    assert not result["thread"].is_alive()
+    assert result["stop"] is False
@@ -0,0 +1,49 @@
+import pytest
+
+from polarity.utils import RateLimiter, TokenBucket
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=10)
+    assert bucket.reserve(10) == 0
+    assert bucket.reserve(5) == pytest.approx(0.5, abs=0.05)
+    assert TokenBucket(rate=0).reserve(10**9) == 0
+
+
+def test_rate_limiter_budgets():
+    limiter = RateLimiter()
+    limiter.set_limits(
+        {"api": {"requests": 2, "bytes": 0}, "cdn": {"requests": 0, "bytes": 100}}
+    )
+    url = "https://cdn.example.com/segment.ts"
+    # budgets are independent
+    for _ in range(2):
+        assert limiter.request_delay(url, "api") == 0
+        assert limiter.request_delay(url, "cdn") == 0
+    assert limiter.request_delay(url, "api") == pytest.approx(0.5, abs=0.05)
+    # hosts are independent
+    assert limiter.request_delay("https://api.example.com/", "api") == 0
+    assert limiter.response_delay(url, {"Content-Length": "150"}, "cdn") == pytest.approx(
+        0.5, abs=0.05
+    )
+    assert limiter.response_delay(url, {}, "cdn") == 0
+    assert limiter.waited["cdn.example.com"] == pytest.approx(1, abs=0.1)
+
+
+def test_head_requests_are_not_charged(monkeypatch):
+    from requests.models import Response
+
+    import polarity.utils
+
+    class FakeSession:
+        def head(self, url, **kwargs):
+            response = Response()
+            response.headers["Content-Length"] = "150"
+            return response
+
+    limiter = RateLimiter()
+    limiter.set_limits({"cdn": {"requests": 0, "bytes": 100}})
+    monkeypatch.setattr(polarity.utils, "rate_limiter", limiter)
+    monkeypatch.setattr(polarity.utils, "get_session", FakeSession)
+    polarity.utils.request_webpage("https://cdn.example.com/video.mp4", "head", "cdn")
+    assert not limiter.waited
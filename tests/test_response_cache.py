@@ -0,0 +1,91 @@
+import os
+
+from requests.models import Response
+
+import polarity.utils
+from polarity.utils import ResponseCache
+
+
+class FakeServer:
+    def __init__(self) -> None:
+        self.requests = []
+        self.content = b'{"title": "Series"}'
+
+    def __call__(self, url: str, method: str = "get", **kwargs) -> Response:
+        headers = kwargs.get("headers") or {}
+        self.requests.append((url, kwargs.get("params"), headers))
+        response = Response()
+        response.url = url
+        if headers.get("If-None-Match") == "v1":
+            response.status_code = 304
+            response._content = b""
+            return response
+        response.status_code = 200
+        response.headers["ETag"] = "v1"
+        response._content = self.content
+        return response
+
+
+def create_cache(tmp_path, monkeypatch, ttl: int = 60, max_size: int = 2**20):
+    server = FakeServer()
+    monkeypatch.setattr(polarity.utils, "request_webpage", server)
+    cache = ResponseCache()
+    cache.configure(f"{tmp_path}/", max_size, {"series": ttl})
+    return cache, server
+
+
+def test_cache_hit(tmp_path, monkeypatch):
+    cache, server = create_cache(tmp_path, monkeypatch)
+    url = "https://example.com/series/1"
+    first = cache.request(url, "get", "series", params={"Signature": "a"})
+    # signatures change every session, they aren't part of the key
+    second = cache.request(url, "get", "series", params={"Signature": "b"})
+    assert len(server.requests) == 1
+    assert first.content == second.content == server.content
+    # requests without an endpoint class aren't cached
+    cache.request(url, "get")
+    assert len(server.requests) == 2
+    assert cache.stats == {"hits": 1, "revalidated": 0, "misses": 1}
+
+
+def test_cache_revalidation(tmp_path, monkeypatch):
+    cache, server = create_cache(tmp_path, monkeypatch, ttl=0)
+    url = "https://example.com/series/1"
+    cache.request(url, "get", "series")
+    response = cache.request(url, "get", "series")
+    assert server.requests[-1][2]["If-None-Match"] == "v1"
+    assert response.status_code == 200
+    assert response.content == server.content
+    assert cache.stats["revalidated"] == 1
+
+
+def test_cache_lru_eviction(tmp_path, monkeypatch):
+    cache, server = create_cache(tmp_path, monkeypatch)
+    for number in (1, 2):
+        cache.request(f"https://example.com/series/{number}", "get", "series")
+    # room for two responses, the stored time can vary a few bytes in length
+    cache.max_size = cache._size + 32
+    # use the first one, so the second is the least recently used
+    cache.request("https://example.com/series/1", "get", "series")
+    cache.request("https://example.com/series/3", "get", "series")
+    assert len(os.listdir(tmp_path)) == 2
+    assert cache._read(cache.key("https://example.com/series/2")) is None
+    assert cache._read(cache.key("https://example.com/series/1")) is not None
+    # the index is rebuilt from disk
+    cache.configure(f"{tmp_path}/", cache.max_size, {"series": 60})
+    cache.request("https://example.com/series/3", "get", "series")
+    assert len(server.requests) == 3
+
+
+def test_cache_hit_removed_file(tmp_path, monkeypatch):
+    cache, server = create_cache(tmp_path, monkeypatch)
+    url = "https://example.com/series/1"
+    cache.request(url, "get", "series")
+
+    def utime(path, *args, **kwargs):
+        # removed by another instance right after reading it
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "utime", utime)
+    assert cache.request(url, "get", "series").content == server.content
+    assert len(server.requests) == 1
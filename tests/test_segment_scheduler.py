@@ -0,0 +1,119 @@
+import threading
+
+import pytest
+
+from polarity.downloader.scheduler import DownloadBudget, SegmentScheduler
+from polarity.types.stream import Segment, SegmentPool
+
+
+def create_pool(media_type: str, number: int, segments: int) -> SegmentPool:
+    pool = SegmentPool(
+        [Segment(f"https://example.com/{i}.ts", i) for i in range(segments)],
+        media_type,
+    )
+    pool.set_id(f"{media_type}{number}")
+    return pool
+
+
+@pytest.mark.parametrize(
+    "pools,expected",
+    [
+        (
+            [("video", 0), ("video", 1), ("audio", 0), ("subtitles", 0)],
+            ["video0", "audio0", "subtitles0", "video1"],
+        ),
+        (
+            [("audio", 0), ("audio", 1), ("audio", 2), ("video", 0)],
+            ["audio0", "video0", "audio1", "audio2"],
+        ),
+    ],
+)
+def test_interleave(pools: list, expected: list):
+    pools = [create_pool(t, n, 1) for t, n in pools]
+    assert [p._id for p in SegmentScheduler.interleave(pools)] == expected
+
+
+def test_assist_busiest_pool():
+    scheduler = SegmentScheduler(
+        [create_pool("video", 0, 10), create_pool("audio", 0, 3)]
+    )
+    assert scheduler.get_pool("worker-0")._id == "video0"
+    assert scheduler.get_pool("worker-1")._id == "audio0"
+    # every pool is reserved, the third worker must assist the busiest one
+    pool = scheduler.get_pool("worker-2")
+    assert pool._id == "video0"
+    assert pool._reserved_by == "worker-0"
+
+
+def test_no_duplicate_segments():
+    pools = [create_pool("video", 0, 500), create_pool("audio", 0, 200)]
+    scheduler = SegmentScheduler(pools)
+    taken = []
+
+    def worker(name: str):
+        while True:
+            pool = scheduler.get_pool(name)
+            if pool is None:
+                return
+            while True:
+                segment = scheduler.next_segment(pool)
+                if segment is None:
+                    break
+                taken.append(segment._id)
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(taken) == len(set(taken)) == 700
+    assert scheduler.pending == 0
+    assert all(p._finished for p in pools)
+
+
+def test_budget_allocation():
+    budget = DownloadBudget(workers=12)
+    budget.register("big", remaining=900)
+    assert budget.allocation("big") == 12
+    budget.register("small", remaining=100)
+    # one worker each, the 10 left split by remaining bytes
+    assert budget.allocation("big") == 10
+    assert budget.allocation("small") == 2
+    # unknown sizes count as an average download
+    budget.register("unknown")
+    assert budget.allocation("unknown") == 1 + int(9 * 500 / 1500)
+    budget.unregister("big")
+    budget.unregister("unknown")
+    assert budget.allocation("small") == 12
+    assert budget.allocation("big") == 0
+
+
+def test_budget_bandwidth():
+    budget = DownloadBudget(bandwidth=0)
+    assert budget.reserve(10**9) == 0
+    budget.set_limits(workers=1, bandwidth=1000)
+    assert budget.reserve(1000) == 0
+    # the burst allowance is spent, next bytes must wait
+    assert budget.reserve(500) == pytest.approx(0.5, abs=0.05)
+    # setting the same limits, like every download does when it starts,
+    # doesn't refill the bucket
+    budget.set_limits(workers=1, bandwidth=1000)
+    assert budget.reserve(500) == pytest.approx(1, abs=0.05)
+
+
+def test_budget_wait():
+    budget = DownloadBudget(workers=2)
+    budget.register("first")
+    version = budget.version
+    waiter = threading.Thread(target=budget.wait, args=(version,), daemon=True)
+    waiter.start()
+    waiter.join(0.1)
+    assert waiter.is_alive()
+    budget.unregister("first")
+    waiter.join(1)
+    assert not waiter.is_alive()
+    # changes made before waiting aren't missed
+    version = budget.version
+    budget.notify()
+    budget.wait(version)
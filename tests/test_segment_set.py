@@ -0,0 +1,52 @@
+import pytest
+
+from polarity.downloader.resume import ResumeJournal, SegmentSet
+
+
+@pytest.mark.parametrize(
+    "numbers,expected",
+    [
+        ([0, 1, 2, 3], [[0, 3]]),
+        ([-1, 0, 1, 5, 7, 8], [[-1, 1], [5, 5], [7, 8]]),
+        ([9, 3, 4, 2], [[2, 4], [9, 9]]),
+        ([], []),
+    ],
+)
+def test_to_ranges(numbers: list, expected: list):
+    assert SegmentSet.to_ranges(numbers) == expected
+
+
+def test_serialize_roundtrip():
+    ids = [f"video0_{i}" for i in range(-1, 5000)] + ["audio0_3", "subtitles0_0"]
+    segments = SegmentSet(ids)
+    serialized = segments.serialize()
+    assert serialized == {
+        "audio0": [[3, 3]],
+        "subtitles0": [[0, 0]],
+        "video0": [[-1, 4999]],
+    }
+    assert set(SegmentSet.deserialize(serialized)) == set(ids)
+
+
+def test_deserialize_legacy_list():
+    segments = SegmentSet.deserialize(["video0_0", "audio0_1"])
+    assert "audio0_1" in segments
+    assert "video0_1" not in segments
+    assert len(segments) == 2
+
+
+def test_journal_append_read(tmp_path):
+    journal = ResumeJournal(f"{tmp_path}/segments.journal", sync_every=2)
+    for i in range(5):
+        journal.append(f"video0_{i}", 100 + i)
+    journal.close()
+    assert list(journal.read()) == [(f"video0_{i}", 100 + i) for i in range(5)]
+    journal.truncate()
+    assert list(journal.read()) == []
+
+
+def test_journal_incomplete_line(tmp_path):
+    path = f"{tmp_path}/segments.journal"
+    with open(path, "w") as f:
+        f.write("video0_0 100\nvideo0_1 10")
+    assert list(ResumeJournal(path).read()) == [("video0_0", 100)]
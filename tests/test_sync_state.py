@@ -0,0 +1,68 @@
+import pytest
+
+from polarity.config import options
+from polarity.extractor import base
+from polarity.types import Season, Series
+from polarity.types.download_log import DownloadLog
+from polarity.types.sync_state import SyncState
+
+
+@pytest.fixture
+def extractor(tmp_path, monkeypatch):
+    (tmp_path / "download.log").write_text("crunchyroll/episode-A\n")
+    log = DownloadLog(str(tmp_path / "download.log"), update_path=False)
+    state = SyncState(str(tmp_path / "sync.json"), update_path=False)
+    monkeypatch.setattr(base, "download_log", log)
+    monkeypatch.setattr(base, "sync_state", state)
+    monkeypatch.setitem(options, "action", "sync")
+    return base.ContentExtractor()
+
+
+def create_series(episode_count: int = 2) -> Series:
+    return Series("Series", "S", extractor="Crunchyroll", episode_count=episode_count)
+
+
+def test_sync_state(tmp_path):
+    state = SyncState(str(tmp_path / "sync.json"), update_path=False)
+    assert state.get("crunchyroll/series-S") == {}
+    state.update("crunchyroll/series-S", {"episode_count": 2})
+    state.update("crunchyroll/series-T", {"episode_count": 3})
+    other = SyncState(state.path, update_path=False)
+    assert other.get("crunchyroll/series-S")["episode_count"] == 2
+    assert "updated" in other.get("crunchyroll/series-T")
+
+
+def test_sync_seasons(extractor):
+    series = create_series()
+    seasons = [Season("1", "1", number=1), Season("2", "2", number=2)]
+    assert not extractor.is_synced(series)
+    assert extractor.sync_seasons(series, seasons) == seasons
+    base.sync_state.update(
+        series.content_id,
+        {
+            "episode_count": 2,
+            "seasons": {
+                "1": {"number": 1, "content": ["crunchyroll/episode-A"]},
+                "2": {"number": 2, "content": []},
+            },
+        },
+    )
+    # Same episode count and everything downloaded
+    assert extractor.is_synced(series)
+    # Only the latest and new seasons can have new content
+    seasons.append(Season("3", "3", number=3))
+    assert extractor.sync_seasons(create_series(3), seasons) == seasons[1:]
+
+
+def test_sync_seasons_not_downloaded(extractor):
+    series = create_series()
+    base.sync_state.update(
+        series.content_id,
+        {
+            "episode_count": 2,
+            "seasons": {"1": {"number": 1, "content": ["crunchyroll/episode-B"]}},
+        },
+    )
+    # Episode B was queued on the last run but not downloaded
+    assert not extractor.is_synced(series)
+    assert len(extractor.sync_seasons(series, [Season("1", "1", number=1)])) == 1
@@ -0,0 +1,46 @@
+from polarity.extractor import flags
+from polarity.Polarity import Polarity
+
+
+def test_input_file(tmp_path):
+    path = tmp_path / "urls.txt"
+    path.write_text(
+        "# comment\n\n"
+        "https://example.com/a\n"
+        "https://example.com/b\n"
+        " https://example.com/b \n"
+    )
+    polarity = Polarity(["https://example.com/a"])
+    polarity.add_url("https://example.com/a")
+    polarity._input_task(str(path), consumers=2)
+    assert [(i["url"], i["order"]) for i in polarity.pool] == [
+        ("https://example.com/a", 0),
+        ("https://example.com/b", 1),
+    ]
+    urls = [polarity.url_queue.get() for _ in range(4)]
+    assert [u["url"] if u else u for u in urls] == [
+        "https://example.com/a",
+        "https://example.com/b",
+        None,
+        None,
+    ]
+
+
+def test_input_file_login(monkeypatch):
+    class LoginExtractor:
+        FLAGS = {flags.ExtractionLoginRequired}
+
+        def is_logged_in(self) -> bool:
+            return False
+
+        def login(self):
+            raise AssertionError("asked for login while reading urls")
+
+    monkeypatch.setattr(
+        "polarity.Polarity.get_compatible_extractor",
+        lambda url: ("Login", LoginExtractor),
+    )
+    polarity = Polarity([])
+    polarity.add_url("https://login.example.com/a", interactive=False)
+    polarity.add_url("https://login.example.com/b", interactive=False)
+    assert not polarity.pool
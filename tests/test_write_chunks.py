@@ -0,0 +1,86 @@
+import errno
+import os
+
+import pytest
+
+import polarity.utils
+
+from polarity.utils import copy_file_data, preallocate, write_at, write_chunks
+
+
+@pytest.mark.parametrize(
+    "chunks,expected",
+    [
+        ([b"segment ", b"data"], b"segment data"),
+        ([b"one chunk"], b"one chunk"),
+        ([], b""),
+    ],
+)
+def test_write_chunks(tmp_path, chunks: list, expected: bytes):
+    path = f"{tmp_path}/segment.ts"
+    assert write_chunks(path, iter(chunks)) == len(expected)
+    assert open(path, "rb").read() == expected
+    # the temporary file must be renamed after writing
+    assert not os.path.exists(f"{path}.part")
+
+
+def test_write_chunks_no_overwrite(tmp_path):
+    path = f"{tmp_path}/segment.ts"
+    write_chunks(path, [b"first"])
+
+    def chunks():
+        yield b"second"
+        raise AssertionError("read the chunks of an existing file")
+
+    generator = chunks()
+    # the existing file's size is counted as downloaded
+    assert write_chunks(path, generator) == 5
+    assert open(path, "rb").read() == b"first"
+    # the generator has been closed
+    assert next(generator, None) is None
+
+
+def _unsupported(*args):
+    raise OSError(errno.ENOSYS, "Function not implemented")
+
+
+@pytest.mark.parametrize(
+    "unsupported", [(), ("copy_file_range",), ("copy_file_range", "sendfile")]
+)
+def test_copy_file_data(tmp_path, monkeypatch, unsupported: tuple):
+    for method in unsupported:
+        monkeypatch.setattr(os, method, _unsupported, raising=False)
+    parts = [os.urandom(3000), os.urandom(5000)]
+    for i, data in enumerate(parts):
+        write_chunks(f"{tmp_path}/part{i}", [data])
+    with open(f"{tmp_path}/merged", "wb") as final:
+        for i, data in enumerate(parts):
+            with open(f"{tmp_path}/part{i}", "rb") as part:
+                assert sum(copy_file_data(part, final, chunk_size=1024)) == len(data)
+    assert open(f"{tmp_path}/merged", "rb").read() == b"".join(parts)
+
+
+def test_copy_file_data_sendfile_linux_only(tmp_path, monkeypatch):
+    def sendfile(out_fd, in_fd, offset, count):
+        # macOS and FreeBSD require an offset, and a socket as out_fd
+        raise TypeError("an integer is required")
+
+    monkeypatch.setattr(polarity.utils, "platform", "darwin")
+    monkeypatch.setattr(os, "copy_file_range", _unsupported, raising=False)
+    monkeypatch.setattr(os, "sendfile", sendfile, raising=False)
+    write_chunks(f"{tmp_path}/part", [b"data"])
+    with open(f"{tmp_path}/merged", "wb") as final:
+        with open(f"{tmp_path}/part", "rb") as part:
+            assert sum(copy_file_data(part, final)) == 4
+    assert open(f"{tmp_path}/merged", "rb").read() == b"data"
+
+
+def test_write_at(tmp_path):
+    path = f"{tmp_path}/output.mp4"
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT)
+    preallocate(fd, 12)
+    # ranges can be written in any order
+    assert write_at(fd, b"range", 7) == 5
+    assert write_at(fd, b"first ", 0) == 6
+    os.close(fd)
+    assert open(path, "rb").read() == b"first \x00range"